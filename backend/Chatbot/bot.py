@@ -1,20 +1,79 @@
+import hashlib
+import json
 import os
+import re
 from dotenv import load_dotenv
 from collections import deque
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_community.vectorstores import FAISS
-import os
-import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from Chatbot.resolver import KeywordResolver, IMAGE_TAG_RE, strip_image_tags
+from Chatbot.singleflight import SingleFlight
+from Chatbot.policy import policy_for
+from Chatbot import faq
+from Chatbot.compact_index import load_store
+from Chatbot.context import build_context, count_tokens, novel_part
+from Chatbot.llm_router import (
+    DEADLINE_S as LLM_DEADLINE_S, GeminiProvider, LLMRouter, OpenAIProvider,
+)
+from utils.rate_limit import admission
 
 # ──────────────────────────────────────────────────────────────────────────────
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = "gpt-4.1-mini"
+POLICY_ENABLED = os.getenv("POLICY_ENABLED", "1") != "0"
+MAX_HISTORY_MESSAGES = 20  # prior user/assistant turns sent with every prompt
+QUERY_BLOCKED = "Query blocked due to policy."
+RESPONSE_BLOCKED = "Response blocked due to policy."
+GREETING = "Hi! I'm your assistant for {project}. Ask me anything!"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Shared LLM and Embeddings
-llm = ChatOpenAI(model=OPENAI_MODEL, temperature=0, openai_api_key=OPENAI_API_KEY)
-embedding = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+
+
+# Shared LLM and Embeddings -----------------------------------------------------
+# LangChain / OpenAI / FAISS are imported on first use (or by Chatbot/warmup.py),
+# not when the Flask app imports this module.
+@lru_cache(maxsize=1)
+def _llm():
+    from langchain_openai import ChatOpenAI
+
+    # the router owns deadlines and failover: no client-side retries, and no
+    # request outlives the router's deadline (the client default is 600s)
+    return ChatOpenAI(model=OPENAI_MODEL, temperature=0, openai_api_key=OPENAI_API_KEY,
+                      timeout=LLM_DEADLINE_S, max_retries=0)
+
+
+@lru_cache(maxsize=1)
+def _embedding():
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+
+
+def _llm_providers():
+    providers = [OpenAIProvider(_llm)]
+    # Gemini is the fallback / hedge target when a key is configured
+    if os.getenv("GEMINI_API_KEY"):
+        providers.append(GeminiProvider())
+    return providers
+
+
+# deadlines, hedging and failover across providers, see Chatbot/llm_router.py;
+# every call holds one of the global in-flight slots, see utils/rate_limit.py
+router = LLMRouter(_llm_providers(), admit=admission.slot)
+
+PROJECTS = ("Krupal Habitat", "Ramvan Villas", "Firefly Homes")
+ALL_PROJECTS = "All Projects"
+
+# multi-project (comparison) mode
+MULTI_K = 4                    # chunks fetched per project index
+MULTI_CONTEXT_TOKENS = 1800    # shared context budget across all projects
+MULTI_MAX_WORKERS = 3          # bound on concurrent index searches
+_retrieval_pool = ThreadPoolExecutor(
+    max_workers=MULTI_MAX_WORKERS, thread_name_prefix="retrieval"
+)
+
+# identical concurrent queries share one pipeline run
+_inflight = SingleFlight()
 
 
 # Prompt templates
@@ -182,6 +241,32 @@ Always answer based on the provided context. If users ask general questions abou
 If any of these are mentioned: {image_keywords}, add:
 IMAGE: <room name>
 
+CONTEXT:
+{context}
+
+USER:
+{query}
+
+ANSWER:
+"""
+
+COMPARE_PROMPT = """
+You are a confident, friendly **real estate sales agent** for the developer behind these projects: {projects}.
+The client wants to compare them. Answer using the CONTEXT, which is grouped by project.
+
+**Rules**
+- Compare the projects side by side on what the client asked (price, location, plot/villa size, amenities, possession, legal).
+- Use bullet points or a short table; keep each project's facts under its own name and never mix them up.
+- Prices: quote the numbers from the context and show totals where the context gives enough to compute them.
+- Be balanced but positive about every project, then recommend one based on the client's stated needs.
+- Never say "I don’t know" — offer to connect them to the sales team (which is you).
+
+**Images**
+Available images per project: {image_keywords}
+For each project where one of its images fits the question, add a line at the end:
+IMAGE: <project name>: <image name>
+
+
 CONTEXT:
 {context}
 
@@ -195,75 +280,93 @@ ANSWER:
 # Project configuration loader
 
 
+# Project images / map links (also used by the keyword resolver)
+PROJECT_IMAGES = {
+    "Krupal Habitat": {
+        "gated community": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903023/gatedcommunity_gpjff4.jpg",
+        "house": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903025/house_cu9on6.jpg",
+        "clubhouse": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903022/clubhouse_opxfdz.jpg",
+        "krupal habitat": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903024/krupalhabitat_ywpcpp.jpg",
+        "payment plan": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749922165/krupal_payment_soj4mc.jpg",
+    },
+    "Ramvan Villas": {
+        "bedroom": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903320/bedroom_rnp54b.jpg",
+        "living room": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903327/livingroom_xdpba4.jpg",
+        "dining room": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903321/diningroom_xezi1c.jpg",
+        "villa": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903321/house_rceotg.jpg",
+        "kitchen": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903321/diningroom_xezi1c.jpg",
+        "payment plan": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749922062/ramvan_payment_ychisk.jpg",
+    },
+    "Firefly Homes": {
+        "clubhouse": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749902620/clubhouse_og4dc2.jpg"
+    },
+}
+PROJECT_MAPS = {
+    "Krupal Habitat": "https://maps.app.goo.gl/jMBMpq5tEcDVi8ZNA",
+    "Ramvan Villas": "https://maps.app.goo.gl/Q5y5SKGX82QnLHPE6?g_st=iw",
+}
+# index directory (under Chatbot/) and answer prompt per project
+PROJECT_SOURCES = {
+    "Krupal Habitat": ("krupaldb_faiss", KRUPAL_PROMPT),
+    "Ramvan Villas": ("ramvan_villas_faiss", RAMVAN_PROMPT),
+    "Firefly Homes": ("firefly_faiss", FIREFLY_PROMPT),
+}
+# compiled once at import, shared by every request
+RESOLVERS = {name: KeywordResolver(images) for name, images in PROJECT_IMAGES.items()}
+
+
 # ──────────────────────────────────────────────────────────────────────────────
+_loaded_projects = set()  # indexes already in memory (for readiness)
+
+
+@lru_cache(maxsize=None)
 def _project_cfg(name: str):
-    if name == "Krupal Habitat":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "krupaldb_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={
-                "gated community": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903023/gatedcommunity_gpjff4.jpg",
-                "house": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903025/house_cu9on6.jpg",
-                "clubhouse": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903022/clubhouse_opxfdz.jpg",
-                "krupal habitat": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903024/krupalhabitat_ywpcpp.jpg",
-                "payment plan": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749922165/krupal_payment_soj4mc.jpg",
-            },
-            tpl=KRUPAL_PROMPT,
-        )
-    if name == "Ramvan Villas":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "ramvan_villas_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={
-                "bedroom": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903320/bedroom_rnp54b.jpg",
-                "living room": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903327/livingroom_xdpba4.jpg",
-                "dining room": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903321/diningroom_xezi1c.jpg",
-                "villa": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903321/house_rceotg.jpg",
-                "kitchen": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749903321/diningroom_xezi1c.jpg",
-                "payment plan": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749922062/ramvan_payment_ychisk.jpg",
-            },
-            tpl=RAMVAN_PROMPT,
-        )
-    if name == "Firefly Homes":
-        return dict(
-            vector=FAISS.load_local(
-                os.path.join(BASE_DIR, "firefly_faiss"),
-                embedding,
-                allow_dangerous_deserialization=True,
-            ),
-            images={
-                "clubhouse": "https://res.cloudinary.com/dqlrfkgt0/image/upload/v1749902620/clubhouse_og4dc2.jpg"
-            },
-            tpl=FIREFLY_PROMPT,
-        )
-    raise ValueError("Unknown project")
+    if name not in PROJECT_SOURCES:
+        raise ValueError("Unknown project")
+    cfg = dict(
+        # float32 / float16 / int8 per VECTOR_STORAGE, see Chatbot/compact_index.py
+        vector=load_store(index_path(name), _embedding()),
+        images=PROJECT_IMAGES[name],
+        map_url=PROJECT_MAPS.get(name),
+        resolver=RESOLVERS[name],
+        tpl=PROJECT_SOURCES[name][1],
+    )
+    _loaded_projects.add(name)
+    return cfg
+
+
+def index_path(name: str) -> str:
+    return os.path.join(BASE_DIR, PROJECT_SOURCES[name][0])
+
+
+def load_project(name: str) -> dict:
+    """Loads (once) and returns a project's index, images and prompt."""
+    return _project_cfg(name)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # tiny helper for LLM calls with explicit history
-def _ask_llm(prompt: str, history: list[dict]):
+def _to_messages(prompt: str, history: list[dict]):
+    from langchain_core.messages import HumanMessage, AIMessage
+
     messages = []
-    for h in history:
+    for h in history[-MAX_HISTORY_MESSAGES:]:
         if h["role"] == "user":
             messages.append(HumanMessage(content=h["content"]))
         else:
             messages.append(AIMessage(content=h["content"]))
     messages.append(HumanMessage(content=prompt))
+    return messages
+
 
-    return llm.invoke(messages).content.strip()
+def _ask_llm(prompt: str, history: list[dict]):
+    return router.invoke(_to_messages(prompt, history))
 
 
 # wrapper filters -------------------------------------------------------------
-def _violates_policy(text: str, history):
-    pol_prompt = f"""You are a content-filter. Reply ONLY "BLOCK" or "ALLOW".
-Text: "{text}" """
-    return _ask_llm(pol_prompt, history).upper() == "BLOCK"
+def _violates_policy(text: str, project: str = None):
+    # local term filter (+ optional classifier), see Chatbot/policy.py
+    return POLICY_ENABLED and policy_for(project).violates(text)
 
 
 def _is_greeting(text: str, history):
@@ -273,51 +376,269 @@ def _is_greeting(text: str, history):
     return _ask_llm(g_prompt, history).upper() == "GREETING"
 
 
+def _route_without_llm(project: str, cfg: dict, user_input: str):
+    """Answers "show me the bedroom" / "where is it?" straight from config."""
+    route = cfg["resolver"].route(user_input)
+    if route.get("intent") == "image":
+        return dict(
+            text=f"Here's a look at the {route['keyword']} at {project}.",
+            image_url=cfg["images"][route["keyword"]],
+        )
+    if route.get("intent") == "map" and cfg["map_url"]:
+        return dict(
+            text=f"{project} on the map: [📍 View on Google Maps]({cfg['map_url']})",
+            image_url=None,
+        )
+    return None
+
+
+def _retrieve(cfg: dict, user_input: str, query_vec: list[float] = None) -> str:
+    # MMR over-fetch + dedup + token budget, see Chatbot/context.py
+    if query_vec is None:
+        query_vec = _embedding().embed_query(user_input)
+    return build_context(cfg["vector"], query_vec)
+
+
+def retrieve_context(project: str, query: str) -> str:
+    """Vector context for `query`; lets callers retrieve ahead of time."""
+    return _retrieve(_project_cfg(project), query)
+
+
+def _build_prompt(cfg: dict, user_input: str, context: str = None) -> str:
+    if context is None:
+        context = _retrieve(cfg, user_input)
+    return cfg["tpl"].format(
+        context=context,
+        query=user_input,
+        image_keywords=", ".join(cfg["images"].keys()),
+    )
+
+
 # ──────────────────────────────────────────────────────────────────────────────
-def generate_response(project: str, history: list[dict]):
+def _generate_response(project: str, history: list[dict], use_faq: bool = True):
+    cfg = _project_cfg(project)
+    user_input = history[-1]["content"]
+
+    # 1 early exits -----------------------------------------------------------
+    if _violates_policy(user_input, project):
+        return dict(text=QUERY_BLOCKED, image_url=None)
+    routed = _route_without_llm(project, cfg, user_input)
+    if routed:
+        return routed
+    query_vec = None
+    if use_faq and faq.worth_matching(project, user_input):
+        # canonical questions answered at ingestion time, see Chatbot/faq.py;
+        # small talk skips this (and the embedding) and goes to _is_greeting
+        query_vec = _embedding().embed_query(user_input)
+        stored = faq.match(project, query_vec, user_input)
+        if stored:
+            return stored
+    if _is_greeting(user_input, history):
+        return dict(text=GREETING.format(project=project), image_url=None)
+
+    # 2 vector context + main prompt ------------------------------------------
+    prompt = _build_prompt(cfg, user_input, _retrieve(cfg, user_input, query_vec))
+
+    # 3 LLM -------------------------------------------------------------------
+    answer = _ask_llm(prompt, history)
+
+    # 4 policy check on answer ------------------------------------------------
+    if _violates_policy(answer, project):
+        return dict(text=RESPONSE_BLOCKED, image_url=None)
+
+    # 5 optional image tag parsing -------------------------------------------
+    answer, _, img_url = cfg["resolver"].extract_image(answer)
+    if not img_url and cfg["resolver"].scan(user_input)["pricing"]:
+        # the prompt asks for IMAGE: payment plan on pricing questions; don't rely on it
+        img_url = cfg["images"].get("payment plan")
+
+    return dict(text=answer, image_url=img_url)
+
+
+def stream_response(project: str, history: list[dict], context: str = None):
     """
-    history: full chat so far, **last item must be the latest USER msg**.
-    Returns {text:str, image_url:str|None}
+    Same pipeline as generate_response, but yields the answer text as the
+    LLM produces it (used by the voice agent). IMAGE tags are left in the
+    stream; callers that speak or render the text should strip them.
+    context: retrieval already done by the caller (see retrieve_context).
     """
     cfg = _project_cfg(project)
     user_input = history[-1]["content"]
 
+    if _violates_policy(user_input, project):
+        yield QUERY_BLOCKED
+        return
+    routed = _route_without_llm(project, cfg, user_input)
+    if routed:
+        yield routed["text"]
+        return
+    if _is_greeting(user_input, history):
+        yield GREETING.format(project=project)
+        return
+
+    prompt = _build_prompt(cfg, user_input, context)
+    check = policy_for(project).stream() if POLICY_ENABLED else None
+    for chunk in router.stream(_to_messages(prompt, history)):
+        if check and check.feed(chunk)["blocked"]:
+            # stop before the offending chunk goes out
+            yield "\n" + RESPONSE_BLOCKED
+            return
+        yield chunk
+    if check and check.finish()["blocked"]:
+        # held-back terms at the very end / the classifier on the full answer
+        yield "\n" + RESPONSE_BLOCKED
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# multi-project comparison mode
+def _search_project(project: str, query_vec: list[float], k: int):
+    docs = _project_cfg(project)["vector"].similarity_search_with_score_by_vector(
+        query_vec, k=k
+    )
+    return [(score, project, doc) for doc, score in docs]
+
+
+def _pack_multi_context(hits: list, projects: list[str], budget: int) -> str:
+    """
+    hits: (distance, project, doc) from every index — lower distance is better.
+    Every project gets its best chunk first, remaining budget goes to the
+    globally best chunks. Repeats within a project are dropped. Output is
+    grouped per project.
+    """
+    hits = sorted(hits, key=lambda h: h[0])
+    best_per_project = {}
+    for h in hits:
+        best_per_project.setdefault(h[1], h)
+    ordered = list(best_per_project.values()) + [
+        h for h in hits if h is not best_per_project[h[1]]
+    ]
+
+    picked = {p: [] for p in projects}
+    used = 0
+    for _, project, doc in ordered:
+        text = novel_part(doc.page_content, picked[project])
+        if not text:
+            continue
+        cost = count_tokens(text)
+        if used + cost > budget and any(picked.values()):
+            continue
+        picked[project].append(text)
+        used += cost
+
+    return "\n\n".join(
+        f"### {p}\n" + "\n".join(chunks) for p, chunks in picked.items() if chunks
+    )
+
+
+def _parse_project_images(answer: str, projects: list[str]):
+    images = {}
+    by_name = {p.lower(): p for p in projects}
+    for match in IMAGE_TAG_RE.finditer(answer):
+        project = by_name.get((match.group("project") or "").strip().lower())
+        if not project:
+            continue
+        _, _, url = RESOLVERS[project].extract_image(match.group(0))
+        if url:
+            images.setdefault(project, url)
+    return strip_image_tags(answer), images
+
+
+def _generate_multi_response(projects: list[str], history: list[dict]):
+    projects = list(projects or PROJECTS)
+    unknown = [p for p in projects if p not in PROJECTS]
+    if unknown:
+        raise ValueError(f"Unknown project(s): {', '.join(unknown)}")
+    user_input = history[-1]["content"]
+
     # 1 early exits -----------------------------------------------------------
+    if _violates_policy(user_input):
+        return dict(text=QUERY_BLOCKED, image_url=None, images={})
     if _is_greeting(user_input, history):
         return dict(
-            text=f"Hi! I'm your assistant for {project}. Ask me anything!",
+            text=f"Hi! I can help you compare {', '.join(projects)}. Ask me anything!",
             image_url=None,
+            images={},
         )
-    # if _violates_policy(user_input, history):
-    #     return dict(text="Query blocked due to policy.", image_url=None)
-
-    # 2 vector context --------------------------------------------------------
-    docs = cfg["vector"].similarity_search(user_input, k=5)
-    context = "\n".join(d.page_content for d in docs)
 
-    # 3 main prompt -----------------------------------------------------------
-    prompt = cfg["tpl"].format(
+    # 2 fan-out retrieval -----------------------------------------------------
+    query_vec = _embedding().embed_query(user_input)
+    futures = [
+        _retrieval_pool.submit(_search_project, p, query_vec, MULTI_K) for p in projects
+    ]
+    hits = []
+    for project, fut in zip(projects, futures):
+        try:
+            hits.extend(fut.result())
+        except Exception as e:
+            print(f"[WARN] Retrieval failed for {project}: {e}")
+    context = _pack_multi_context(hits, projects, MULTI_CONTEXT_TOKENS)
+
+    # 3 single LLM call -------------------------------------------------------
+    prompt = COMPARE_PROMPT.format(
+        projects=", ".join(projects),
         context=context,
         query=user_input,
-        image_keywords=", ".join(cfg["images"].keys()),
+        image_keywords="; ".join(
+            f"{p}: {', '.join(_project_cfg(p)['images'].keys())}" for p in projects
+        ),
     )
     answer = _ask_llm(prompt, history)
 
-    # 4 policy check on answer ------------------------------------------------
-    # if _violates_policy(answer, history):
-    #     return dict(text="Response blocked due to policy.", image_url=None)
+    if _violates_policy(answer):
+        return dict(text=RESPONSE_BLOCKED, image_url=None, images={})
 
-    # 5 optional image tag parsing -------------------------------------------
-    img_url = None
-    match = re.search(r"image:\s*(\w[\w\s]*)", answer, re.IGNORECASE)
-    if match:
-        keyword = match.group(1).strip().lower()
-        img_url = cfg["images"].get(keyword)
-        if img_url:
-            answer = re.sub(
-                r"image:\s*[\w\s]*", "", answer, flags=re.IGNORECASE
-            ).strip()
-        else:
-            print(f"[WARN] No image found for keyword: '{keyword}'")
+    # 4 per-project images ----------------------------------------------------
+    answer, images = _parse_project_images(answer, projects)
+    return dict(
+        text=answer,
+        image_url=next(iter(images.values()), None),
+        images=images,
+    )
 
-    return dict(text=answer, image_url=img_url)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# request coalescing
+_QUERY_NOISE = re.compile(r"[^\w\s]+")
+
+
+def _flight_key(scope, history: list[dict]):
+    """(project(s), normalized latest query, fingerprint of everything before it)"""
+    query = " ".join(_QUERY_NOISE.sub(" ", history[-1]["content"].lower()).split())
+    prior = json.dumps(
+        [(h["role"], h["content"]) for h in history[:-1]], ensure_ascii=False
+    )
+    return scope, query, hashlib.sha1(prior.encode("utf-8")).hexdigest()
+
+
+def generate_response(project: str, history: list[dict]):
+    """
+    history: full chat so far, **last item must be the latest USER msg**.
+    Returns {text:str, image_url:str|None}
+    """
+    key = _flight_key(project, history)
+    return dict(_inflight.do(key, _generate_response, project, history))
+
+
+def generate_multi_response(projects: list[str], history: list[dict]):
+    """
+    Comparison mode: one query answered from several project indexes.
+    The query is embedded once, the indexes are searched concurrently
+    (bounded by MULTI_MAX_WORKERS), and a single LLM call writes the answer.
+    Returns {text:str, image_url:str|None, images:{project: url}}
+    """
+    scope = tuple(projects) if projects else ALL_PROJECTS
+    key = _flight_key(scope, history)
+    return dict(_inflight.do(key, _generate_multi_response, projects, history))
+
+
+def warm_status() -> dict:
+    """What is already loaded, without loading anything."""
+    return dict(
+        indexes=sorted(_loaded_projects),
+        llm=_llm.cache_info().currsize > 0,
+        embedding=_embedding.cache_info().currsize > 0,
+    )
+
+
+def engine_stats() -> dict:
+    return dict(coalescing=_inflight.stats(), llm=router.stats(), faq=faq.stats())
@@ -0,0 +1,174 @@
+import os
+import pickle
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Compact vector storage for the project indexes (VECTOR_STORAGE):
+#   float32  the FAISS index as saved by LangChain (default)
+#   float16  IndexScalarQuantizer QT_fp16 — 2x smaller
+#   int8     IndexScalarQuantizer QT_8bit — 4x smaller
+# Compact modes search the quantized index for RESCORE_FACTOR * k candidates,
+# then re-rank them exactly against the float32 vectors, which are kept in a
+# memory-mapped .npy (paged in per candidate, not held in RAM). Both files are
+# derived from index.faiss on first load and rebuilt whenever it changes.
+
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")
+RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+VECTORS_FILE = "vectors.f32.npy"
+_QTYPES = {"float16": "QT_fp16", "int8": "QT_8bit"}
+
+
+def _compact_path(index_dir: str, storage: str) -> str:
+    return os.path.join(index_dir, f"index.{storage}.faiss")
+
+
+def _stale(path: str, source: str) -> bool:
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source)
+
+
+def _quantize(vectors, metric_type: int, storage: str):
+    import faiss
+
+    qtype = getattr(faiss.ScalarQuantizer, _QTYPES[storage])
+    index = faiss.IndexScalarQuantizer(vectors.shape[1], qtype, metric_type)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def prepare(index_dir: str, storage: str = VECTOR_STORAGE):
+    """Writes vectors.f32.npy and index.<storage>.faiss next to index.faiss."""
+    import faiss
+    import numpy as np
+
+    source = os.path.join(index_dir, "index.faiss")
+    vec_path = os.path.join(index_dir, VECTORS_FILE)
+    sq_path = _compact_path(index_dir, storage)
+    if not (_stale(vec_path, source) or _stale(sq_path, source)):
+        return
+
+    flat = faiss.read_index(source)
+    vectors = flat.reconstruct_n(0, flat.ntotal).astype("float32")
+    # per-process tmp names: several workers may build these at the same time
+    tmp = f"{os.getpid()}.tmp"
+    with open(f"{vec_path}.{tmp}", "wb") as f:
+        np.save(f, vectors)
+    os.replace(f"{vec_path}.{tmp}", vec_path)
+    faiss.write_index(_quantize(vectors, flat.metric_type, storage), f"{sq_path}.{tmp}")
+    os.replace(f"{sq_path}.{tmp}", sq_path)
+
+
+class RescoredIndex:
+    """
+    Quantized index + exact float32 re-ranking. Implements the parts of a
+    faiss index LangChain's FAISS store calls: search, reconstruct, ntotal, d.
+    """
+
+    def __init__(self, coarse, vectors, factor: int = RESCORE_FACTOR):
+        import faiss
+
+        self.coarse = coarse
+        self.vectors = vectors  # (ntotal, d) float32, usually np.load(mmap_mode="r")
+        self.factor = factor
+        self.d = coarse.d
+        self.metric_type = coarse.metric_type
+        self._inner_product = coarse.metric_type == faiss.METRIC_INNER_PRODUCT
+
+    @property
+    def ntotal(self) -> int:
+        return self.coarse.ntotal
+
+    def search(self, x, k: int):
+        import numpy as np
+
+        _, candidates = self.coarse.search(x, min(self.ntotal, k * self.factor))
+        D = np.full((len(x), k), -np.inf if self._inner_product else np.inf, dtype="float32")
+        I = np.full((len(x), k), -1, dtype="int64")
+        for row, (q, ids) in enumerate(zip(x, candidates)):
+            # sorted ids read the memmap front to back, and with a stable sort
+            # below tied (duplicate) chunks keep the flat index's id order
+            ids = np.sort(ids[ids >= 0])
+            cand = np.asarray(self.vectors[ids], dtype="float32")
+            if self._inner_product:
+                exact = cand @ q
+                order = np.argsort(-exact, kind="stable")[:k]
+            else:
+                exact = ((cand - q) ** 2).sum(axis=1)  # squared L2, as IndexFlatL2
+                order = np.argsort(exact, kind="stable")[:k]
+            D[row, :len(order)] = exact[order]
+            I[row, :len(order)] = ids[order]
+        return D, I
+
+    def reconstruct(self, i: int):
+        import numpy as np
+
+        return np.asarray(self.vectors[i], dtype="float32")
+
+
+def load_store(index_dir: str, embeddings, storage: str = VECTOR_STORAGE):
+    """LangChain FAISS store for `index_dir` with the configured vector storage."""
+    from langchain_community.vectorstores import FAISS
+
+    if storage == "float32":
+        return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+    if storage not in _QTYPES:
+        raise ValueError(f"Unknown VECTOR_STORAGE '{storage}' (float32, float16, int8)")
+
+    import faiss
+    import numpy as np
+
+    prepare(index_dir, storage)
+    with open(os.path.join(index_dir, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    index = RescoredIndex(
+        faiss.read_index(_compact_path(index_dir, storage)),
+        np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r"),
+    )
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# benchmark:  python -m Chatbot.compact_index  (from backend/, fully offline)
+# Queries are synthesised from the stored vectors (normalised blend of two
+# chunks + noise), so no embedding calls are needed. Reports index memory,
+# per-query latency and top-5 agreement with the float32 flat index.
+if __name__ == "__main__":
+    import statistics
+    import time
+    import faiss
+    import numpy as np
+
+    from Chatbot.bot import PROJECTS, index_path
+
+    K, N_QUERIES = 5, 300
+    rng = np.random.default_rng(0)
+
+    def timed_search(index, queries):
+        ids, lat = [], []
+        for q in queries:
+            started = time.perf_counter()
+            _, I = index.search(q[None, :], K)
+            lat.append(time.perf_counter() - started)
+            ids.append(I[0])
+        return ids, statistics.median(lat) * 1e6
+
+    for project in PROJECTS:
+        flat = faiss.read_index(os.path.join(index_path(project), "index.faiss"))
+        vectors = flat.reconstruct_n(0, flat.ntotal).astype("float32")
+        n, d = vectors.shape
+        a, b = rng.integers(0, n, N_QUERIES), rng.integers(0, n, N_QUERIES)
+        queries = vectors[a] + vectors[b] + rng.normal(0, 0.01, (N_QUERIES, d)).astype("float32")
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        base, base_us = timed_search(flat, queries)
+        print(f"\n{project}: {n} vectors x {d} dims (rescoring reads a memmapped float32 copy)")
+        print(f"  {'storage':<18}{'index MB':>9}{'p50 us':>9}{'top-5 overlap':>15}{'same order':>12}")
+        print(f"  {'float32 flat':<18}{n * d * 4 / 2**20:9.2f}{base_us:9.0f}{1:15.3f}{1:12.3f}")
+        for storage in ("float16", "int8"):
+            sq = _quantize(vectors, flat.metric_type, storage)
+            mb = sq.code_size * n / 2**20
+            for label, index in ((storage, sq),
+                                 (f"{storage} + rescore", RescoredIndex(sq, vectors))):
+                ids, us = timed_search(index, queries)
+                overlap = statistics.mean(len(set(x) & set(y)) / K for x, y in zip(ids, base))
+                same = statistics.mean(float(list(x) == list(y)) for x, y in zip(ids, base))
+                print(f"  {label:<18}{mb:9.2f}{us:9.0f}{overlap:15.3f}{same:12.3f}")
@@ -0,0 +1,166 @@
+import os
+import re
+from functools import lru_cache
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Context builder: over-fetch from the index, pick a diverse set with MMR
+# (maximal marginal relevance), drop repeated / near-duplicate chunks and the
+# ~50-char overlaps the splitter leaves between neighbours, then pack what is
+# left into a token budget, most relevant first.
+
+CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKENS", "900"))  # per single-project prompt
+FETCH_K = 25        # candidates pulled from the index
+SELECT_K = 10       # kept by MMR before dedup / packing
+MMR_LAMBDA = 0.7    # 1 = pure relevance, 0 = pure diversity
+DUP_JACCARD = 0.85  # word-shingle similarity above which a chunk is a repeat
+SHINGLE = 3
+MIN_OVERLAP = 20    # shortest shared prefix/suffix worth trimming (chars)
+MAX_OVERLAP = 300
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken count when available, else ~4 chars per token."""
+    enc = _encoding()
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode(text, disallowed_special=()))
+
+
+# dedup -------------------------------------------------------------------------
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of `head` that is a prefix of `tail`."""
+    for k in range(min(len(head), len(tail), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if head.endswith(tail[:k]):
+            return k
+    return 0
+
+
+def novel_part(text: str, kept: list[str]):
+    """
+    `text` minus what the already `kept` chunks cover, or None when it adds
+    nothing: exact / contained repeats, near-duplicates, overlapping edges.
+    """
+    text = text.strip()
+    sh = _shingles(text)
+    for other in kept:
+        if text in other or _jaccard(sh, _shingles(other)) >= DUP_JACCARD:
+            return None
+    for other in kept:
+        cut = _overlap(other, text)
+        if cut:
+            text = text[cut:].lstrip()
+        cut = _overlap(text, other)
+        if cut:
+            text = text[:-cut].rstrip()
+    return text or None
+
+
+def dedupe(texts: list[str]) -> list[str]:
+    kept = []
+    for text in texts:
+        part = novel_part(text, kept)
+        if part:
+            kept.append(part)
+    return kept
+
+
+def pack(texts: list[str], budget: int) -> list[str]:
+    """Greedy fill in the given order; chunks that don't fit are skipped."""
+    picked, used = [], 0
+    for text in texts:
+        cost = count_tokens(text)
+        if used + cost > budget and picked:
+            continue
+        picked.append(text)
+        used += cost
+    return picked
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def select_chunks(store, query_vec: list[float], budget: int = CONTEXT_TOKENS,
+                  k: int = SELECT_K, fetch_k: int = FETCH_K,
+                  lambda_mult: float = MMR_LAMBDA) -> list[str]:
+    hits = store.max_marginal_relevance_search_with_score_by_vector(
+        query_vec, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult
+    )
+    # MMR returns picks in selection order; emit by relevance (lower distance first)
+    hits.sort(key=lambda h: h[1])
+    return pack(dedupe([doc.page_content for doc, _ in hits]), budget)
+
+
+def build_context(store, query_vec: list[float], budget: int = CONTEXT_TOKENS) -> str:
+    return "\n".join(select_chunks(store, query_vec, budget))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# measurement:  python -m Chatbot.context  (from backend/, needs OPENAI_API_KEY)
+# labeled queries: (project, question, facts the context/answer should contain)
+EVAL_QUERIES = [
+    ("Krupal Habitat", "What is the price per square yard?", ["sq yd"]),
+    ("Krupal Habitat", "How big is plot 12?", ["plot 12"]),
+    ("Krupal Habitat", "Why invest in Dholera?", ["dholera"]),
+    ("Krupal Habitat", "What amenities are planned?", ["amenit"]),
+    ("Ramvan Villas", "What is the payment plan?", ["booking", "registry"]),
+    ("Ramvan Villas", "How far is Jim Corbett?", ["bijrani"]),
+    ("Ramvan Villas", "Which legal approvals are in place?", ["clear title"]),
+    ("Firefly Homes", "Where is Firefly Homes located?", ["uttarakhand"]),
+    ("Firefly Homes", "What are the plot sizes?", ["sq"]),
+]
+
+if __name__ == "__main__":
+    import statistics
+    import time
+    from Chatbot import bot
+
+    def recall(text, facts):
+        text = text.lower()
+        return sum(f in text for f in facts) / len(facts)
+
+    rows = {"top-5 (before)": [], "mmr + dedup": []}
+    for project, question, facts in EVAL_QUERIES:
+        cfg = bot._project_cfg(project)
+        query_vec = bot._embedding().embed_query(question)
+        before = "\n".join(
+            d.page_content for d, _ in
+            cfg["vector"].similarity_search_with_score_by_vector(query_vec, k=5)
+        )
+        after = build_context(cfg["vector"], query_vec)
+        for label, context in (("top-5 (before)", before), ("mmr + dedup", after)):
+            prompt = bot._build_prompt(cfg, question, context)
+            started = time.perf_counter()
+            answer = bot._ask_llm(prompt, [])
+            rows[label].append(dict(
+                tokens=count_tokens(prompt),
+                latency=time.perf_counter() - started,
+                context_recall=recall(context, facts),
+                answer_recall=recall(answer, facts),
+            ))
+
+    for label, r in rows.items():
+        print(
+            f"{label:>15}: prompt tokens {statistics.mean(x['tokens'] for x in r):6.0f}"
+            f" | answer p50 {statistics.median(x['latency'] for x in r) * 1000:5.0f} ms"
+            f" | context recall {statistics.mean(x['context_recall'] for x in r):.2f}"
+            f" | answer recall {statistics.mean(x['answer_recall'] for x in r):.2f}"
+        )
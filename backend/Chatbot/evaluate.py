@@ -0,0 +1,395 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Chatbot import bot, faq
+from Chatbot.context import count_tokens
+from Chatbot.llm_router import FakeProvider, LLMRouter, OpenAIProvider, Provider
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Batch offline evaluation of the answer pipeline (generate_response).
+#
+#   python -m Chatbot.evaluate Chatbot/eval_cases.jsonl            (from backend/)
+#          [--concurrency 4] [--cache tmp/eval_cache.json]
+#          [--live] [--replay-latency] [--out report.jsonl]
+#
+# Cases (JSONL): {"id", "project", "history": [{role, content}], "question",
+#                 "expect": {"facts": [...], "numbers": [...], "image": kw|null,
+#                            "live": {<same keys>}}}
+#
+# LLM answers and embeddings go through a stage cache keyed by their exact
+# inputs, so a run only recomputes the stages a change actually touched.
+# --live fills misses from OpenAI and records them for the next offline run.
+# Offline (default) misses go to a scripted stand-in instead: lexical
+# embeddings built from the index vectors, so retrieval still finds the
+# chunks that share the query's words, and an extractive "LLM" that answers
+# with the prompt lines closest to the question. That checks routing,
+# retrieval, prompt contents and post-processing; expectations that need a
+# real model (computed totals, phrasing) go under "live" and are only
+# checked on recorded or live answers.
+
+# under backend/tmp/ (git-ignored), not next to the sources
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "tmp", "eval_cache.json")
+EMBED_DIMS = 1536
+EXTRACT_LINES = 4  # prompt lines the scripted LLM answers with
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOP = frozenset("""
+    a an the is are was be of to in on at for and or with from by as it its this
+    that me my i you your we our us what whats which who how much many do does
+    can could will would there their about tell please any all
+""".split())
+
+
+def _stem(word: str) -> str:
+    # crude, but enough for "located" ~ "location" ~ "locate"
+    for suffix in ("ion", "ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if len(word) > 4 and word.endswith("e") else word
+
+
+def _content_words(text: str) -> set:
+    return {_stem(w) for w in _WORD_RE.findall(text.lower()) if w not in _STOP}
+
+
+class StageCache:
+    """{"llm": {key: {text, latency_s}}, "embed": {key: vector}} in one JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = dict(llm={}, embed={})
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data.update(json.load(f))
+        self.counts = dict(llm_hits=0, llm_misses=0, embed_hits=0, embed_misses=0)
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+    def get(self, stage: str, key: str):
+        with self._lock:
+            value = self.data[stage].get(key)
+            self.counts[f"{stage}_{'hits' if value is not None else 'misses'}"] += 1
+            return value
+
+    def put(self, stage: str, key: str, value):
+        with self._lock:
+            self.data[stage][key] = value
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+
+class CassetteProvider(Provider):
+    """Replays recorded answers; misses go to `fallback` (and are recorded if live)."""
+
+    name = "cassette"
+
+    def __init__(self, cache: StageCache, fallback: Provider, record: bool,
+                 replay_latency: bool = False):
+        self.cache = cache
+        self.fallback = fallback
+        self.record = record
+        self.replay_latency = replay_latency
+
+    @staticmethod
+    def key(cache: StageCache, messages) -> str:
+        return cache.key(bot.OPENAI_MODEL, [(m.type, m.content) for m in messages])
+
+    def stream(self, messages, stop):
+        key = self.key(self.cache, messages)
+        hit = self.cache.get("llm", key)
+        if hit is not None:
+            if self.replay_latency and stop.wait(hit["latency_s"]):
+                return
+            yield hit["text"]
+            return
+        started = time.perf_counter()
+        parts = list(self.fallback.stream(messages, stop))
+        if self.record and not stop.is_set():
+            self.cache.put("llm", key, dict(text="".join(parts),
+                                            latency_s=time.perf_counter() - started))
+        yield from parts
+
+
+def scripted_answer(messages) -> str:
+    """Offline LLM: answers with the prompt lines sharing most words with the question."""
+    from Chatbot.faq import SMALL_TALK
+
+    prompt = messages[-1].content
+    if prompt.startswith('Reply "GREETING"'):
+        text = prompt.split('"')[3]  # Reply "GREETING" if "<text>" is ...
+        words = _WORD_RE.findall(text.lower())
+        return "GREETING" if all(w in SMALL_TALK for w in words) else "QUERY"
+
+    head, _, tail = prompt.rpartition("USER:")
+    question = _content_words(tail.split("ANSWER:")[0])
+    lines = [line.strip() for line in head.splitlines() if line.strip()]
+    words = [_content_words(line) for line in lines]
+    df = {}
+    for line_words in words:
+        for w in line_words & question:
+            df[w] = df.get(w, 0) + 1
+    context_at = next((i for i, line in enumerate(lines) if line == "CONTEXT:"), len(lines))
+    scored = sorted(
+        # rare shared words count most; ties go to CONTEXT lines, then earlier lines
+        ((sum(math.log(1 + len(lines) / df[w]) for w in line_words & question),
+          i >= context_at, -i) for i, line_words in enumerate(words)),
+        reverse=True,
+    )
+    picked = set()
+    for score, _, neg_i in scored[:EXTRACT_LINES]:
+        i = -neg_i
+        if score:
+            picked.add(i)
+            if lines[i].endswith(":") and i + 1 < len(lines):
+                picked.add(i + 1)  # "Total (2250 sq. ft.):" is followed by its value
+    return "\n".join(lines[i] for i in sorted(picked)) or "Let me connect you to our sales team."
+
+
+class LexicalEmbeddings:
+    """
+    Offline stand-in for the embedding model: a text's vector is the mean of
+    the stored vectors of the index chunks that share the most (rare) words
+    with it, so similarity search behaves roughly like the real thing.
+    """
+
+    def __init__(self, top: int = 3):
+        self.top = top
+        self._chunks = None  # [(words, vector)] across every project index
+        self._idf = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        chunks = []
+        for project in bot.PROJECTS:
+            store = bot.load_project(project)["vector"]
+            for i, doc_id in store.index_to_docstore_id.items():
+                doc = store.docstore.search(doc_id)
+                chunks.append((_content_words(doc.page_content),
+                               [float(x) for x in store.index.reconstruct(i)]))
+        df = {}
+        for words, _ in chunks:
+            for w in words:
+                df[w] = df.get(w, 0) + 1
+        self._idf = {w: math.log(len(chunks) / n) for w, n in df.items()}
+        return chunks
+
+    @staticmethod
+    def _fake(text: str) -> list[float]:
+        seed = hashlib.sha256(text.encode()).digest()
+        return [(seed[i % 32] - 127.5) / 127.5 for i in range(EMBED_DIMS)]
+
+    def embed_query(self, text: str) -> list[float]:
+        with self._lock:
+            if self._chunks is None:
+                self._chunks = self._load()
+        words = _content_words(text)
+        scored = sorted(
+            ((sum(self._idf[w] for w in words & chunk_words), vec)
+             for chunk_words, vec in self._chunks),
+            key=lambda sv: sv[0], reverse=True,
+        )[:self.top]
+        scored = [(score, vec) for score, vec in scored if score > 0]
+        if not scored:
+            return self._fake(text)
+        total = sum(score for score, _ in scored)
+        return [sum(score * vec[d] for score, vec in scored) / total
+                for d in range(len(scored[0][1]))]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(t) for t in texts]
+
+
+class CachedEmbeddings:
+    """Embeddings interface over the stage cache; misses go to `fallback`, recorded if live."""
+
+    def __init__(self, cache: StageCache, fallback, record: bool):
+        self.cache = cache
+        self.fallback = fallback
+        self.record = record
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self.cache.key("query", text)
+        vec = self.cache.get("embed", key)
+        if vec is None:
+            vec = self.fallback.embed_query(text)
+            if self.record:
+                self.cache.put("embed", key, vec)
+        return vec
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(t) for t in texts]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+_case = threading.local()  # per-case usage counters (cases run on pool threads)
+
+
+def install(cache: StageCache, live: bool = False, replay_latency: bool = False):
+    """Points bot.py at the cached / fake stack for the rest of the process."""
+    real_llm, real_embedding = bot._llm, bot._embedding
+    if live:
+        fallback, embed_fallback = OpenAIProvider(real_llm), real_embedding()
+    else:
+        fallback, embed_fallback = FakeProvider("scripted", respond=scripted_answer), \
+            LexicalEmbeddings()
+    embeddings = CachedEmbeddings(cache, embed_fallback, record=live)
+
+    bot._embedding = lambda: embeddings
+    bot.router = LLMRouter([CassetteProvider(cache, fallback, live, replay_latency)])
+    faq.FAQ_AUTO_BUILD = False  # no background FAQ generation during a run
+
+    ask_llm = bot._ask_llm
+
+    def counted(prompt: str, history: list[dict]):
+        if not live:
+            key = CassetteProvider.key(cache, bot._to_messages(prompt, history))
+            if key not in cache.data["llm"]:
+                _case.scripted = True  # answered by scripted_answer, not a recording
+        answer = ask_llm(prompt, history)
+        usage = getattr(_case, "usage", None)
+        if usage is not None:
+            usage["llm_calls"] += 1
+            usage["prompt_tokens"] += count_tokens(prompt) + sum(
+                count_tokens(h["content"]) for h in history[-bot.MAX_HISTORY_MESSAGES:]
+            )
+            usage["completion_tokens"] += count_tokens(answer)
+        return answer
+
+    bot._ask_llm = counted
+
+
+def _numbers(text: str) -> set:
+    return {re.sub(r"\D", "", n) for n in re.findall(r"\d[\d,]*", text)}
+
+
+def check(case: dict, result: dict, live: bool = True) -> dict:
+    """{check name: passed} for the case's expectations ("live" ones only if `live`)."""
+    expect = dict(case.get("expect", {}))
+    live_expect = expect.pop("live", {})
+    if live:
+        for name, values in live_expect.items():
+            expect[name] = values if name == "image" else expect.get(name, []) + values
+    text = result["text"].lower()
+    checks = {}
+    for fact in expect.get("facts", []):
+        checks[f"fact:{fact}"] = fact.lower() in text
+    found = _numbers(result["text"])
+    for number in expect.get("numbers", []):
+        checks[f"number:{number}"] = re.sub(r"\D", "", str(number)) in found
+    if "image" in expect:
+        keyword = expect["image"]
+        wanted = bot.PROJECT_IMAGES.get(case["project"], {}).get(keyword) if keyword else None
+        checks[f"image:{keyword}"] = result.get("image_url") == wanted
+    return checks
+
+
+def run_case(case: dict) -> dict:
+    _case.usage = dict(llm_calls=0, prompt_tokens=0, completion_tokens=0)
+    _case.scripted = False
+    history = list(case.get("history", [])) + [{"role": "user", "content": case["question"]}]
+    started = time.perf_counter()
+    try:
+        result = bot.generate_response(case["project"], history)
+        error = None
+    except Exception as e:
+        result, error = dict(text="", image_url=None), f"{type(e).__name__}: {e}"
+    latency = time.perf_counter() - started
+    checks = check(case, result, live=not _case.scripted)
+    return dict(
+        id=case.get("id"),
+        project=case["project"],
+        scripted=_case.scripted,
+        passed=error is None and all(checks.values()),
+        checks=checks,
+        error=error,
+        latency_ms=round(latency * 1000),
+        **_case.usage,
+        answer=result["text"],
+    )
+
+
+def run(cases: list[dict], concurrency: int = 4) -> list[dict]:
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="eval") as pool:
+        return list(pool.map(run_case, cases))
+
+
+def summarize(rows: list[dict]) -> dict:
+    checks = [ok for r in rows for ok in r["checks"].values()]
+    latencies = sorted(r["latency_ms"] for r in rows)
+    return dict(
+        cases=len(rows),
+        passed=sum(r["passed"] for r in rows),
+        scripted=sum(r["scripted"] for r in rows),  # checked without "live" expectations
+        check_pass_rate=round(sum(checks) / len(checks), 3) if checks else None,
+        errors=sum(r["error"] is not None for r in rows),
+        latency_p50_ms=statistics.median(latencies) if latencies else None,
+        latency_p95_ms=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        if latencies else None,
+        llm_calls=sum(r["llm_calls"] for r in rows),
+        prompt_tokens=sum(r["prompt_tokens"] for r in rows),
+        completion_tokens=sum(r["completion_tokens"] for r in rows),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-evaluate generate_response.")
+    parser.add_argument("cases", help="JSONL file of evaluation cases")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="stage cache (JSON)")
+    parser.add_argument("--live", action="store_true",
+                        help="fill cache misses from OpenAI and record them")
+    parser.add_argument("--replay-latency", action="store_true",
+                        help="sleep for the recorded LLM latency on cache hits")
+    parser.add_argument("--out", help="write per-case results as JSONL")
+    args = parser.parse_args()
+
+    with open(args.cases, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    for i, case in enumerate(cases, start=1):
+        case.setdefault("id", f"case-{i}")
+
+    cache = StageCache(args.cache)
+    install(cache, live=args.live, replay_latency=args.replay_latency)
+    rows = run(cases, args.concurrency)
+    cache.save()
+
+    for r in rows:
+        failed = [name for name, ok in r["checks"].items() if not ok]
+        status = ("PASS" if r["passed"] else "FAIL") + ("*" if r["scripted"] else " ")
+        print(f"{status} {r['id']:<28}{r['latency_ms']:>7} ms  llm={r['llm_calls']}"
+              f"  tokens={r['prompt_tokens']}+{r['completion_tokens']}"
+              f"  {r['error'] or ', '.join(failed)}")
+    if any(r["scripted"] for r in rows):
+        print("* scripted offline answer: \"live\" expectations not checked")
+    print(json.dumps(dict(summarize(rows), cache=cache.counts), indent=2))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
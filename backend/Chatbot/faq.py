@@ -0,0 +1,381 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build lock
+    fcntl = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Precomputed FAQ answers. Ingestion (Injest/injest.py) runs the normal answer
+# pipeline once per canonical question and stores the answers + question
+# embeddings next to the project's FAISS index (faq.json). The chat path then
+# answers a query that is close enough to one of them with zero LLM calls.
+#
+# A store is versioned by a hash of the index files, the project prompt, the
+# question list and the model; when any of those change it stops being served
+# and is rebuilt in the background (FAQ_AUTO_BUILD=0 leaves it to ingestion).
+# Only one process builds a store at a time (a lock file next to faq.json);
+# a failed rebuild is retried after FAQ_RETRY_S, doubling up to FAQ_RETRY_MAX_S.
+#
+# Similarity alone can't tell "price breakdown of a plot" from "price
+# breakdown of a 300 sq yard plot", so a match is only served when the query
+# adds no numbers or qualifiers the FAQ question doesn't have. The threshold
+# is checked against labeled queries (faq_labels.jsonl):  python -m Chatbot.faq
+
+FAQ_FILE = "faq.json"
+FAQ_MIN_SIMILARITY = float(os.getenv("FAQ_MIN_SIMILARITY", "0.92"))  # cosine
+FAQ_LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "faq_labels.jsonl")
+FAQ_AUTO_BUILD = os.getenv("FAQ_AUTO_BUILD", "1") != "0"
+FAQ_QUESTIONS_PATH = os.getenv("FAQ_QUESTIONS_PATH")  # optional JSON override
+FAQ_RETRY_S = float(os.getenv("FAQ_RETRY_S", "30"))
+FAQ_RETRY_MAX_S = float(os.getenv("FAQ_RETRY_MAX_S", "1800"))
+
+FAQ_QUESTIONS = {
+    "Krupal Habitat": [
+        "What is the price breakdown of a plot?",
+        "What is the payment plan?",
+        "Where is Krupal Habitat located?",
+        "What amenities does Krupal Habitat offer?",
+        "What is the legal status of the project?",
+    ],
+    "Ramvan Villas": [
+        "What is the price breakdown of a plot?",
+        "What is the payment plan?",
+        "Where is Ramvan Villas located?",
+        "What amenities does Ramvan Villas offer?",
+        "What legal approvals does the project have?",
+    ],
+    "Firefly Homes": [
+        "What is the price breakdown of a plot?",
+        "What is the payment plan?",
+        "Where is Firefly Homes located?",
+        "What amenities does Firefly Homes offer?",
+        "What is the legal status of the project?",
+    ],
+}
+
+# words that make a question more specific than the canonical one
+QUALIFIERS = frozenset("""
+    sq sqft sqyd yard yards yd feet ft foot meter meters acre acres gaj bigha
+    bhk 1bhk 2bhk 3bhk 4bhk corner facing east west north south park road
+    villa villas duplex cottage floor floors
+    emi loan nri gst registry stamp discount offer installment instalment monthly
+    per each extra additional including excluding without except only
+    cheapest cheaper largest smallest biggest bigger smaller minimum maximum
+    vs versus compare compared than
+""".split())
+# a query made only of these is small talk, never a FAQ (no embedding needed)
+SMALL_TALK = frozenset("""
+    hi hii hello hey hola namaste yo good morning afternoon evening night
+    thanks thank you thx ok okay cool nice great bye sure yes no yeah
+    there sir madam ma am
+""".split())
+MIN_QUERY_WORDS = 3
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_NUMBER_RE = re.compile(r"\d+")
+
+_stores = {}        # project -> (file signature, loaded store or None, needs rebuild)
+_building = set()   # projects with a background rebuild running in this process
+_retry = {}         # project -> (failed rebuilds in a row, monotonic time of next try)
+_lock = threading.Lock()
+_counts = dict(hits=0, misses=0, rebuilds=0)
+
+
+def questions_for(project: str) -> list[str]:
+    if FAQ_QUESTIONS_PATH:
+        with open(FAQ_QUESTIONS_PATH, encoding="utf-8") as f:
+            return json.load(f).get(project, [])
+    return FAQ_QUESTIONS.get(project, [])
+
+
+def _index_files(project: str) -> list[str]:
+    from Chatbot import bot
+
+    index_dir = bot.index_path(project)
+    return [os.path.join(index_dir, n) for n in ("index.faiss", "index.pkl")]
+
+
+def _store_path(project: str) -> str:
+    from Chatbot import bot
+
+    return os.path.join(bot.index_path(project), FAQ_FILE)
+
+
+def store_version(project: str) -> str:
+    from Chatbot import bot
+
+    h = hashlib.sha256()
+    for path in _index_files(project):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    h.update(bot.PROJECT_SOURCES[project][1].encode())
+    h.update(json.dumps(questions_for(project)).encode())
+    h.update(bot.OPENAI_MODEL.encode())
+    return h.hexdigest()[:16]
+
+
+def _signature(project: str):
+    """Cheap change detector: (mtime, size) of the index files and the store."""
+    sig = []
+    for path in _index_files(project) + [_store_path(project)]:
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _normalise(vec):
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+@contextmanager
+def _build_lock(project: str, wait: bool = True):
+    """
+    Exclusive lock on faq.json.lock, shared by every process on the host.
+    wait=False raises BlockingIOError if another process holds it.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(_store_path(project) + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _fixed_replies(project: str) -> set:
+    """Canned replies of the pipeline; never worth storing as a FAQ answer."""
+    from Chatbot import bot
+
+    return {bot.QUERY_BLOCKED, bot.RESPONSE_BLOCKED, bot.GREETING.format(project=project)}
+
+
+def build(project: str, force: bool = False, wait: bool = True) -> dict:
+    """
+    Answers every FAQ question with the live pipeline and writes faq.json.
+    Questions that come back blocked or as a greeting are left out.
+    """
+    from Chatbot import bot
+
+    with _build_lock(project, wait):
+        questions = questions_for(project)
+        version = store_version(project)
+        path = _store_path(project)
+        if not force and os.path.exists(path):
+            # also covers another process having built it while we waited
+            with open(path, encoding="utf-8") as f:
+                current = json.load(f)
+            if current.get("version") == version:
+                return current
+
+        vectors = bot._embedding().embed_documents(questions) if questions else []
+        fixed = _fixed_replies(project)
+        entries = []
+        for question, vec in zip(questions, vectors):
+            answer = bot._generate_response(
+                project, [{"role": "user", "content": question}], use_faq=False
+            )
+            if answer["text"].strip() in fixed:
+                print(f"[WARN] FAQ {project}: not storing {question!r}, got {answer['text']!r}")
+                continue
+            entries.append(dict(question=question, text=answer["text"],
+                                image_url=answer["image_url"], vector=_normalise(vec)))
+        store = dict(project=project, version=version, entries=entries)
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(store, f)
+        os.replace(tmp, path)
+        return store
+
+
+def _rebuild(project: str):
+    try:
+        build(project, wait=False)
+        _counts["rebuilds"] += 1
+        _retry.pop(project, None)
+    except BlockingIOError:
+        # another worker is building it and its faq.json will change the
+        # signature; look again later in case that worker dies mid-build
+        failures = _retry.get(project, (0, 0))[0]
+        _retry[project] = (failures, time.monotonic() + FAQ_RETRY_S)
+    except Exception as e:
+        failures = _retry.get(project, (0, 0))[0] + 1
+        delay = min(FAQ_RETRY_S * 2 ** (failures - 1), FAQ_RETRY_MAX_S)
+        _retry[project] = (failures, time.monotonic() + delay)
+        print(f"[WARN] FAQ rebuild failed for {project} ({failures}x), retrying in {delay:.0f}s: {e}")
+    finally:
+        with _lock:
+            _stores.pop(project, None)  # re-read on the next request
+            _building.discard(project)
+
+
+def _schedule_rebuild(project: str):
+    with _lock:
+        if project in _building:
+            return
+        _building.add(project)
+    threading.Thread(target=_rebuild, args=(project,), name=f"faq-{project}",
+                     daemon=True).start()
+
+
+def _maybe_rebuild(project: str):
+    if FAQ_AUTO_BUILD and time.monotonic() >= _retry.get(project, (0, 0))[1]:
+        _schedule_rebuild(project)
+
+
+def _current(project: str):
+    """The served store for `project`, or None if missing / stale."""
+    sig = _signature(project)
+    cached = _stores.get(project)
+    if cached and cached[0] == sig:
+        if cached[2]:
+            _maybe_rebuild(project)  # a failed rebuild's retry may be due
+        return cached[1]
+
+    store = None
+    stale = False
+    if questions_for(project) and sig[0] is not None:
+        try:
+            with open(_store_path(project), encoding="utf-8") as f:
+                store = json.load(f)
+        except FileNotFoundError:
+            pass
+        if store is not None and store.get("version") != store_version(project):
+            store = None  # documents, prompt or questions changed since ingestion
+        stale = store is None
+        if stale:
+            _maybe_rebuild(project)
+    _stores[project] = (sig, store, stale)
+    return store
+
+
+def has_store(project: str) -> bool:
+    return _current(project) is not None
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _specifics(text: str) -> set:
+    """Numbers and qualifier words in `text`."""
+    words = _words(text)
+    return {w for w in words if w in QUALIFIERS} | set(_NUMBER_RE.findall(text))
+
+
+def worth_matching(project: str, query: str) -> bool:
+    """Cheap pre-check before embedding the query: a served store, not small talk."""
+    words = _words(query)
+    if len(words) < MIN_QUERY_WORDS or all(w in SMALL_TALK for w in words):
+        return False
+    return has_store(project)
+
+
+def _best(project: str, entries, query_vec, query: str, threshold: float):
+    q = _normalise(query_vec)
+    wanted = _specifics(query) - set(_words(project))  # "Ramvan Villas" isn't a qualifier
+    scored = sorted(
+        ((sum(a * b for a, b in zip(q, e["vector"])), e) for e in entries),
+        key=lambda se: se[0], reverse=True,
+    )
+    for score, entry in scored:
+        if score < threshold:
+            break
+        if wanted <= _specifics(entry["question"]):
+            return entry
+    return None
+
+
+def match(project: str, query_vec: list[float], query: str):
+    """Stored {text, image_url} for the closest FAQ question, if close enough."""
+    store = _current(project)
+    if not store or not store["entries"]:
+        return None
+    entry = _best(project, store["entries"], query_vec, query, FAQ_MIN_SIMILARITY)
+    if entry is None:
+        _counts["misses"] += 1
+        return None
+    _counts["hits"] += 1
+    return dict(text=entry["text"], image_url=entry["image_url"])
+
+
+def stats() -> dict:
+    return dict(_counts, building=sorted(_building),
+                served=sorted(p for p, (_, s, _) in _stores.items() if s),
+                failing={p: n for p, (n, _) in _retry.items() if n})
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def load_labels(path: str = FAQ_LABELS_PATH) -> list[dict]:
+    """[{project, query, faq: canonical question or None}]"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def sweep(labels: list[dict], embed, thresholds) -> list[dict]:
+    """
+    How match() would do on `labels` at each threshold. embed: fn(texts) ->
+    vectors. correct = served the labeled answer, wrong = served another one
+    (or one where none should be), missed = labeled answer not served.
+    """
+    entries = {}
+    for project in {lab["project"] for lab in labels}:
+        questions = questions_for(project)
+        entries[project] = [dict(question=q, vector=_normalise(v))
+                            for q, v in zip(questions, embed(questions))]
+    query_vecs = embed([lab["query"] for lab in labels])
+
+    rows = []
+    for threshold in thresholds:
+        correct = wrong = missed = 0
+        for lab, vec in zip(labels, query_vecs):
+            entry = _best(lab["project"], entries[lab["project"]], vec, lab["query"], threshold)
+            served = entry["question"] if entry else None
+            if served is not None and served == lab["faq"]:
+                correct += 1
+            elif served is not None:
+                wrong += 1
+            elif lab["faq"] is not None:
+                missed += 1
+        rows.append(dict(threshold=threshold, correct=correct, wrong=wrong, missed=missed,
+                         precision=round(correct / (correct + wrong), 3) if correct + wrong else None))
+    return rows
+
+
+# threshold check on labeled queries (live embeddings):
+#   python -m Chatbot.faq [--labels Chatbot/faq_labels.jsonl]  (from backend/)
+if __name__ == "__main__":
+    import argparse
+
+    from Chatbot import bot
+
+    parser = argparse.ArgumentParser(description="Check FAQ_MIN_SIMILARITY on labeled queries.")
+    parser.add_argument("--labels", default=FAQ_LABELS_PATH)
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[0.85, 0.88, 0.90, 0.92, 0.94, 0.96])
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    rows = sweep(labels, bot._embedding().embed_documents, args.thresholds)
+    print(f"{len(labels)} labeled queries, "
+          f"{sum(lab['faq'] is not None for lab in labels)} should hit a FAQ")
+    for r in rows:
+        mark = "  <- FAQ_MIN_SIMILARITY" if r["threshold"] == FAQ_MIN_SIMILARITY else ""
+        print(f"  {r['threshold']:.2f}: correct {r['correct']:>3}  wrong {r['wrong']:>3}"
+              f"  missed {r['missed']:>3}  precision {r['precision']}{mark}")
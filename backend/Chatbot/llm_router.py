@@ -0,0 +1,325 @@
+import os
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+# ──────────────────────────────────────────────────────────────────────────────
+# LLM router: one interface over several chat providers (OpenAI, Gemini, …)
+# with per-call deadlines, hedged requests, failover and circuit breaking.
+#
+# A call starts on the first healthy provider. If no first token arrives
+# within `hedge_after_s` (or that provider fails), the next provider is
+# started as well; whichever produces a first token first wins and the
+# others are told to stop.
+#
+# `admit` (optional) is a zero-arg context manager factory held for the whole
+# call, e.g. utils.rate_limit.admission.slot: only real LLM calls take one of
+# the global in-flight slots, not cache hits or coalesced waiters.
+
+HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_MS", "1500")) / 1000
+DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", "30"))
+ROUTER_WORKERS = int(os.getenv("LLM_ROUTER_WORKERS", "16"))
+
+
+class LLMTimeout(TimeoutError):
+    pass
+
+
+class LLMUnavailable(RuntimeError):
+    pass
+
+
+# providers -------------------------------------------------------------------
+class Provider:
+    """stream(messages, stop) yields text chunks; messages are LangChain messages."""
+
+    name = "provider"
+
+    def stream(self, messages, stop: threading.Event):
+        raise NotImplementedError
+
+
+class OpenAIProvider(Provider):
+    """factory: zero-arg callable returning a LangChain chat model (built on first use)."""
+
+    def __init__(self, factory, name: str = "openai"):
+        self.factory = factory
+        self.name = name
+
+    def stream(self, messages, stop):
+        for chunk in self.factory().stream(messages):
+            if stop.is_set():
+                return
+            if chunk.content:
+                yield chunk.content
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    def stream(self, messages, stop):
+        # utils.gemini configures the client (and raises without a key) at import
+        # time, so it is only imported once a call actually reaches Gemini
+        from utils.gemini import stream_gemini
+
+        contents = [
+            {"role": "user" if m.type == "human" else "model", "parts": [m.content]}
+            for m in messages
+        ]
+        for text in stream_gemini(contents, timeout=DEADLINE_S):
+            if stop.is_set():
+                return
+            yield text
+
+
+class FakeProvider(Provider):
+    """Local stand-in with injected delays / failures (offline runs, benchmarks)."""
+
+    def __init__(self, name: str, text: str = "ok", first_token_s: float = 0.0,
+                 token_s: float = 0.0, fail: bool = False, respond=None):
+        self.name = name
+        self.text = text
+        self.first_token_s = first_token_s
+        self.token_s = token_s
+        self.fail = fail
+        self.respond = respond  # optional fn(messages) -> text
+        self.calls = 0
+
+    def stream(self, messages, stop):
+        self.calls += 1
+        if stop.wait(self.first_token_s):
+            return
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        text = self.respond(messages) if self.respond else self.text
+        for word in text.split(" "):
+            if stop.is_set():
+                return
+            yield word + " "
+            if self.token_s:
+                time.sleep(self.token_s)
+
+
+# health / stats --------------------------------------------------------------
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; retries after `cooldown_s`."""
+
+    def __init__(self, threshold: int = 3, cooldown_s: float = 30.0):
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_s:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class ProviderStats:
+    def __init__(self, window: int = 500):
+        self.first_token_s = deque(maxlen=window)
+        self.total_s = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, first_token_s=None, total_s=None, error=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            if first_token_s is not None:
+                self.first_token_s.append(first_token_s)
+            if total_s is not None:
+                self.total_s.append(total_s)
+
+    @staticmethod
+    def _pct(samples, q):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            first, total = list(self.first_token_s), list(self.total_s)
+            return dict(
+                calls=self.calls,
+                errors=self.errors,
+                wins=self.wins,
+                first_token_p50_ms=round(statistics.median(first) * 1000) if first else None,
+                first_token_p95_ms=self._pct(first, 0.95),
+                total_p50_ms=round(statistics.median(total) * 1000) if total else None,
+                total_p95_ms=self._pct(total, 0.95),
+            )
+
+
+# router ------------------------------------------------------------------------
+class LLMRouter:
+    def __init__(self, providers: list, hedge_after_s: float = HEDGE_AFTER_S,
+                 deadline_s: float = DEADLINE_S, max_workers: int = ROUTER_WORKERS,
+                 breaker_threshold: int = 3, breaker_cooldown_s: float = 30.0,
+                 admit=None):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_after_s = hedge_after_s
+        self.deadline_s = deadline_s
+        self.breakers = {p.name: CircuitBreaker(breaker_threshold, breaker_cooldown_s)
+                         for p in self.providers}
+        self.stats_by_provider = {p.name: ProviderStats() for p in self.providers}
+        self.hedged = 0
+        self.admit = admit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def _candidates(self):
+        healthy = [p for p in self.providers if self.breakers[p.name].allow()]
+        # everything tripped: still try, in order, rather than fail outright
+        return healthy or list(self.providers)
+
+    def _attempt(self, provider, messages, events: queue.Queue, stop: threading.Event):
+        started = time.monotonic()
+        first = None
+        try:
+            for text in provider.stream(messages, stop):
+                if first is None:
+                    first = time.monotonic() - started
+                events.put(("token", provider, text))
+            if stop.is_set():
+                return  # lost the race / cancelled: says nothing about health
+            self.breakers[provider.name].record_success()
+            self.stats_by_provider[provider.name].record(first, time.monotonic() - started)
+            events.put(("done", provider, None))
+        except Exception as e:
+            if not stop.is_set():
+                self.breakers[provider.name].record_failure()
+                self.stats_by_provider[provider.name].record(first, error=True)
+            events.put(("error", provider, e))
+
+    def stream(self, messages, deadline_s: float = None):
+        """Yields text chunks from whichever provider answers first."""
+        with self.admit() if self.admit else nullcontext():
+            yield from self._stream(messages, deadline_s)
+
+    def _stream(self, messages, deadline_s: float = None):
+        deadline = time.monotonic() + (deadline_s or self.deadline_s)
+        pending = self._candidates()
+        events = queue.Queue()
+        stops = {}
+        running = set()
+        winner = None
+        errors = []
+
+        def launch():
+            provider = pending.pop(0)
+            stops[provider.name] = threading.Event()
+            running.add(provider.name)
+            self._pool.submit(self._attempt, provider, messages, events, stops[provider.name])
+
+        launch()
+        hedge_at = time.monotonic() + self.hedge_after_s
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    raise LLMTimeout(f"no complete answer within {deadline_s or self.deadline_s}s")
+                wait = deadline - now
+                if winner is None and pending:
+                    wait = min(wait, max(0.0, hedge_at - now))
+                try:
+                    kind, provider, payload = events.get(timeout=wait)
+                except queue.Empty:
+                    if winner is None and pending and time.monotonic() >= hedge_at:
+                        self.hedged += 1
+                        launch()
+                        hedge_at = time.monotonic() + self.hedge_after_s
+                    continue
+
+                if winner is not None and provider is not winner:
+                    continue
+                if kind == "error":
+                    if winner is not None:
+                        raise payload  # failed mid-answer; can't switch providers now
+                    errors.append(f"{provider.name}: {payload}")
+                    running.discard(provider.name)
+                    if pending:
+                        launch()  # fail over straight away, no need to wait for the hedge
+                        hedge_at = time.monotonic() + self.hedge_after_s
+                    elif not running:
+                        raise LLMUnavailable("; ".join(errors))
+                    continue
+                if winner is None:
+                    winner = provider
+                    self.stats_by_provider[provider.name].wins += 1
+                    for name, stop in stops.items():
+                        if name != provider.name:
+                            stop.set()
+                if kind == "done":
+                    return
+                yield payload
+        finally:
+            for stop in stops.values():
+                stop.set()
+
+    def invoke(self, messages, deadline_s: float = None) -> str:
+        return "".join(self.stream(messages, deadline_s)).strip()
+
+    def stats(self) -> dict:
+        return dict(
+            hedged=self.hedged,
+            providers={
+                p.name: dict(self.stats_by_provider[p.name].snapshot(),
+                             circuit=self.breakers[p.name].state)
+                for p in self.providers
+            },
+        )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# offline demo:  python -m Chatbot.llm_router  (from backend/)
+if __name__ == "__main__":
+    def timed(router, label):
+        started = time.monotonic()
+        try:
+            text = router.invoke([])
+        except Exception as e:
+            text = f"<{type(e).__name__}: {e}>"
+        print(f"{label:>28}: {(time.monotonic() - started) * 1000:6.0f} ms -> {text!r}")
+
+    slow = FakeProvider("primary", "primary answer", first_token_s=2.0)
+    fast = FakeProvider("secondary", "secondary answer", first_token_s=0.2)
+    timed(LLMRouter([slow, fast], hedge_after_s=0.3), "slow primary, hedge at 300ms")
+
+    broken = FakeProvider("primary", fail=True)
+    router = LLMRouter([broken, FakeProvider("secondary", "fallback answer")],
+                       breaker_threshold=2)
+    for i in range(3):
+        timed(router, f"failing primary, call {i + 1}")
+    print(f"primary calls: {broken.calls} (circuit {router.breakers['primary'].state})")
+
+    timed(LLMRouter([FakeProvider("only", first_token_s=1.0)], deadline_s=0.5),
+          "deadline 500ms")
+    print(router.stats())
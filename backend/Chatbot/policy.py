@@ -0,0 +1,257 @@
+import os
+import pickle
+import re
+from functools import lru_cache
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Local content-policy filter (replaces the BLOCK/ALLOW LLM round-trips).
+# Term lists are compiled into one alternation per project, so checking a
+# query or an answer is a single regex pass. An optional local classifier
+# (any pickled model with predict_proba, e.g. a scikit-learn pipeline) can
+# be layered on top via POLICY_CLASSIFIER_PATH.
+
+# Only phrases that are off-topic or abusive in any context. Bare nouns buyers
+# (and the bot's own answers) use for real things around a project — temples,
+# churches, drug stores, elections, crime rates — are not listed; anything
+# subtler is left to the optional classifier.
+BLOCK_TERMS = {
+    "religion": [
+        "which religion", "religion is better", "religious conversion*", "conversion to islam",
+        "hindu muslim", "hindus and muslims", "love jihad", "communal riot*",
+        "communal violence", "communal tension*", "caste discrimination", "lower caste*",
+        "upper caste*", "only hindus", "only muslims", "no muslims", "no hindus",
+    ],
+    "sex": [
+        "sex", "sexual", "sexy", "porn*", "nude", "nudes", "naked", "escort",
+        "escorts", "prostitut*", "erotic", "xxx",
+    ],
+    "politics": [
+        "vote for", "who should i vote", "which party", "bjp", "congress party",
+        "aam aadmi party", "rahul gandhi", "kejriwal", "political opinion*",
+    ],
+    "terrorism": [
+        "terrorist*", "terrorism", "bomb", "bombs", "bombing", "bomb blast", "isis",
+        "al qaeda", "jihadi*", "militant*", "explosives",
+    ],
+    "violence": [
+        "how to kill", "i will kill", "i'll kill", "kill you", "kill him", "kill her",
+        "kill them", "murder you", "murder him", "murder her", "how to murder",
+        "shoot you", "rape", "raped", "rapist", "weapon*", "buy a gun", "buy guns",
+    ],
+    "drugs": [
+        "cocaine", "heroin", "ganja", "marijuana", "meth", "lsd", "charas", "opium",
+        "mdma", "buy drugs", "sell drugs", "drug dealer*", "drug peddl*", "smoke weed",
+    ],
+}
+
+# landmarks (with their common spellings) that are fine for a project even
+# though they contain a listed term; also masked before the classifier runs
+PROJECT_ALLOW = {
+    "Krupal Habitat": [],
+    "Ramvan Villas": [
+        "garjiya temple", "garjiya devi temple", "garjia temple", "garjia devi temple",
+        "girjiya devi temple", "girija devi temple", "girija temple", "sitabani temple",
+        "sitabani", "hanuman dham", "kainchi dham", "temple town",
+    ],
+    "Firefly Homes": [
+        "tarkeshwar dham", "tarkeshwar temple", "tarkeshwar mahadev temple",
+        "durga devi temple", "st mary's church", "st. mary's church", "saint mary's church",
+        "st john's church", "st. john's church", "garhwal rifles", "war memorial",
+    ],
+}
+
+# common obfuscations: s3x, dr*gs, p0rn — only inside words that also have
+# letters, so plain numbers ("plot 1515", "4500 sq ft") are left alone
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "@": "a", "$": "s"})
+_LEET_TOKEN = re.compile(r"[\w@$]*[a-z][\w@$]*", re.IGNORECASE)
+
+
+def _deleet(text: str) -> str:
+    # 1:1 character mapping, so match positions line up with the original text
+    return _LEET_TOKEN.sub(lambda m: m.group(0).translate(_LEET), text)
+
+
+CLASSIFIER_PATH = os.getenv("POLICY_CLASSIFIER_PATH")
+CLASSIFIER_THRESHOLD = float(os.getenv("POLICY_CLASSIFIER_THRESHOLD", "0.8"))
+
+ALLOW = dict(blocked=False, category=None, term=None)
+
+
+def _term_regex(term: str) -> str:
+    stem = term.rstrip("*")
+    body = re.escape(stem).replace(r"\ ", r"\s+")
+    return body + (r"\w*" if term.endswith("*") else "")
+
+
+def _alternation(terms) -> str:
+    return "|".join(_term_regex(t) for t in sorted(terms, key=len, reverse=True))
+
+
+class PolicyFilter:
+    """
+    check(text) -> {blocked, category, term}
+    block_terms: {category: [term, ...]}; a trailing * matches any word ending.
+    allow_terms: phrases whose matches never block.
+    classifier:  optional fn(text) -> probability of a violation.
+    """
+
+    def __init__(self, block_terms: dict, allow_terms=(), classifier=None,
+                 threshold: float = CLASSIFIER_THRESHOLD):
+        self._category = {}
+        groups = []
+        for i, (category, terms) in enumerate(block_terms.items()):
+            self._category[f"c{i}"] = category
+            groups.append(f"(?P<c{i}>{_alternation(terms)})")
+        self._block = re.compile(rf"\b(?:{'|'.join(groups)})\b", re.IGNORECASE)
+        self._allow = (
+            re.compile(rf"\b(?:{_alternation(allow_terms)})\b", re.IGNORECASE)
+            if allow_terms else None
+        )
+        self.classifier = classifier
+        self.threshold = threshold
+        # longest phrase we could have to see across a chunk boundary
+        self.max_term_len = max(
+            len(t) for terms in block_terms.values() for t in terms
+        ) + 16
+        self.max_allow_len = max((len(t) for t in allow_terms), default=0) + 16
+        allow_lower = [t.lower() for t in allow_terms]
+        # blocked words that start an allowed phrase ("temple" in "temple town")
+        self._allow_words = {w.rstrip("*") for t in allow_lower for w in t.split()}
+
+    def _allow_spans(self, text: str):
+        return [m.span() for m in self._allow.finditer(text)] if self._allow else []
+
+    def _block_match(self, text: str):
+        """First block-term match not covered by an allowed phrase, or None."""
+        allowed = self._allow_spans(text)
+        for match in self._block.finditer(text):
+            start, end = match.span()
+            if any(a <= start and end <= b for a, b in allowed):
+                continue
+            return match
+        return None
+
+    def find_block(self, text: str):
+        """(match, text it was found in) — checks the de-leeted text as well."""
+        match = self._block_match(text)
+        if match is None:
+            leet = _deleet(text)
+            if leet != text:
+                match = self._block_match(leet)
+                text = leet
+        return match, text
+
+    def _hit(self, match) -> dict:
+        return dict(blocked=True, category=self._category[match.lastgroup],
+                    term=match.group(0))
+
+    def allow_start(self, text: str, pos: int) -> int:
+        """Moves `pos` back to the start of an allowed phrase that spans it."""
+        if not self._allow or pos <= 0:
+            return pos
+        lo = max(0, pos - self.max_allow_len)
+        for a, b in self._allow_spans(text[lo:pos + self.max_allow_len]):
+            if lo + a < pos < lo + b:
+                return lo + a
+        return pos
+
+    def may_extend_to_allowed(self, term: str) -> bool:
+        return self._allow is not None and term.lower() in self._allow_words
+
+    def check_terms(self, text: str) -> dict:
+        if not text:
+            return ALLOW
+        match, _ = self.find_block(text)
+        return self._hit(match) if match else ALLOW
+
+    def check(self, text: str) -> dict:
+        result = self.check_terms(text)
+        if result["blocked"] or self.classifier is None or not text:
+            return result
+        if self.classifier(self._mask_allowed(text)) >= self.threshold:
+            return dict(blocked=True, category="classifier", term=None)
+        return ALLOW
+
+    def _mask_allowed(self, text: str) -> str:
+        if self._allow is None:
+            return text
+        return self._allow.sub(lambda m: "landmark", text)
+
+    def violates(self, text: str) -> bool:
+        return self.check(text)["blocked"]
+
+    def stream(self):
+        return StreamPolicyCheck(self)
+
+
+class StreamPolicyCheck:
+    """
+    Incremental check for streamed output: feed() each chunk, only the new
+    text plus a short overlap with the previous chunk is scanned. The overlap
+    is widened to the start of any allowed phrase it would cut in half, and a
+    blocked word at the very end that may still become an allowed phrase
+    ("temple" before " town") is held until more text arrives.
+    finish() settles anything held and runs the (slower) classifier once.
+    """
+
+    def __init__(self, policy: PolicyFilter):
+        self.policy = policy
+        self._text = ""
+        self._scan_from = 0
+        self.result = ALLOW
+
+    def _scan(self, final: bool) -> dict:
+        policy = self.policy
+        start = policy.allow_start(self._text, self._scan_from)
+        while start > 0 and self._text[start - 1].isalnum():
+            start -= 1  # never start mid-word, "\\b" would match there
+        window = self._text[start:]
+        match, scanned = policy.find_block(window)
+        next_from = max(0, len(self._text) - policy.max_term_len)
+        if match is not None:
+            near_end = len(window) - match.end() < policy.max_allow_len
+            if final or not (near_end and policy.may_extend_to_allowed(match.group(0))):
+                return policy._hit(match)
+            next_from = min(next_from, start + match.start())  # re-check it next time
+            match, _ = policy.find_block(scanned[:match.start()])
+            if match is not None:
+                return policy._hit(match)
+        self._scan_from = next_from
+        return ALLOW
+
+    def feed(self, chunk: str) -> dict:
+        if self.result["blocked"] or not chunk:
+            return self.result
+        self._text += chunk
+        self.result = self._scan(final=False)
+        return self.result
+
+    def finish(self) -> dict:
+        if not self.result["blocked"] and self._text:
+            self.result = self._scan(final=True)
+        if not self.result["blocked"] and self.policy.classifier is not None:
+            self.result = self.policy.check(self._text)
+        return self.result
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _load_classifier():
+    if not CLASSIFIER_PATH:
+        return None
+    try:
+        with open(CLASSIFIER_PATH, "rb") as f:
+            model = pickle.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not load policy classifier '{CLASSIFIER_PATH}': {e}")
+        return None
+    return lambda text: float(model.predict_proba([text])[0][1])
+
+
+@lru_cache(maxsize=None)
+def policy_for(project: str = None) -> PolicyFilter:
+    """Compiled filter for a project (built once, then shared)."""
+    allow = PROJECT_ALLOW.get(project, [])
+    if project is None:
+        allow = [t for terms in PROJECT_ALLOW.values() for t in terms]
+    return PolicyFilter(BLOCK_TERMS, allow, classifier=_load_classifier())
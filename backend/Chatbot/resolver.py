@@ -0,0 +1,134 @@
+import re
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Keyword / intent resolution.
+# Every project gets one compiled alternation of all its image keywords and
+# intent phrases, built once at startup, so a single regex pass over a query
+# or an answer tells us which images, map or pricing intents it mentions.
+
+MAP_TERMS = (
+    "location", "located", "map", "maps", "address", "directions", "direction",
+    "where is", "where exactly", "how to reach", "how do i reach", "route",
+)
+PRICING_TERMS = (
+    "price", "prices", "pricing", "cost", "costs", "rate", "rates",
+    "payment plan", "payment", "emi", "booking amount", "bsp", "charges",
+    "how much", "budget", "total cost",
+)
+SHOW_TERMS = (
+    "show", "show me", "see", "view", "picture", "pictures", "photo",
+    "photos", "pic", "pics", "image", "images", "look like",
+)
+
+# longer queries always go through the full pipeline
+_MAX_ROUTED_WORDS = 10
+# words a routed query may contain besides keywords / intent terms
+_FILLER = frozenset("""
+    a an the me us i we you it its this that of for to in on at is are can could
+    please pls send share give get what whats how where do does your my our
+    project site property
+""".split())
+
+# `IMAGE: <keyword>` or, in comparison mode, `IMAGE: <project>: <keyword>`
+IMAGE_TAG_RE = re.compile(
+    r"[ \t]*\**`?image:\s*(?:(?P<project>[^:\n]+?):\s*)?(?P<keyword>\w[\w ]*\w|\w)`?\**[ \t]*",
+    re.IGNORECASE,
+)
+_SPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+
+def _norm(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.strip().lower())
+
+
+def _aliases(keyword: str):
+    yield keyword
+    if " " in keyword:
+        yield keyword.replace(" ", "")      # "living room" -> "livingroom"
+    if not keyword.endswith("s"):
+        yield keyword + "s"                  # "bedroom" -> "bedrooms"
+
+
+class KeywordResolver:
+    """
+    images: {keyword: url} for one project.
+    scan() returns {images:[keyword..], map:bool, pricing:bool, show:bool}.
+    """
+
+    def __init__(self, images: dict):
+        self.images = {_norm(k): v for k, v in images.items()}
+        self._terms = {}
+        for term in MAP_TERMS:
+            self._terms[term] = ("map", None)
+        for term in PRICING_TERMS:
+            self._terms[term] = ("pricing", None)
+        for term in SHOW_TERMS:
+            self._terms[term] = ("show", None)
+        # image keywords win over intent words ("payment plan" is both)
+        for keyword in self.images:
+            for alias in _aliases(keyword):
+                self._terms[alias] = ("image", keyword)
+
+        alternation = "|".join(
+            re.escape(t).replace(r"\ ", r"\s+")
+            for t in sorted(self._terms, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+    def scan(self, text: str) -> dict:
+        hit = dict(images=[], map=False, pricing=False, show=False)
+        for match in self._pattern.finditer(text or ""):
+            kind, keyword = self._terms[_norm(match.group(0))]
+            if kind == "image":
+                if keyword not in hit["images"]:
+                    hit["images"].append(keyword)
+            else:
+                hit[kind] = True
+        return hit
+
+    def _leftover_words(self, text: str) -> list[str]:
+        rest = self._pattern.sub(" ", text or "")
+        return [w for w in _WORD_RE.findall(rest.lower()) if w not in _FILLER]
+
+    def route(self, query: str) -> dict:
+        """
+        Pre-LLM routing for short, single-intent queries.
+        Returns {intent: "image"|"map", keyword:str|None} or {} when the
+        query needs the full pipeline.
+        """
+        if len(_WORD_RE.findall(query or "")) > _MAX_ROUTED_WORDS:
+            return {}
+        hit = self.scan(query)
+        # "location advantage of dholera" still needs the LLM
+        if hit["pricing"] or self._leftover_words(query):
+            return {}
+        if hit["show"] and len(hit["images"]) == 1 and not hit["map"]:
+            return dict(intent="image", keyword=hit["images"][0])
+        if hit["map"] and not hit["images"]:
+            return dict(intent="map", keyword=None)
+        return {}
+
+    def extract_image(self, answer: str):
+        """
+        Post-LLM tag extraction.
+        Returns (answer_without_tags, keyword|None, url|None).
+        """
+        match = IMAGE_TAG_RE.search(answer or "")
+        if not match:
+            return answer, None, None
+        keyword = _norm(match.group("keyword"))
+        url = self.images.get(keyword)
+        if not url:
+            # tag text like "bedroom interiors" -> first known keyword inside it
+            found = self.scan(keyword)["images"]
+            keyword = found[0] if found else keyword
+            url = self.images.get(keyword)
+        if not url:
+            print(f"[WARN] No image found for keyword: '{keyword}'")
+            return answer, keyword, None
+        return strip_image_tags(answer), keyword, url
+
+
+def strip_image_tags(answer: str) -> str:
+    return IMAGE_TAG_RE.sub("", answer or "").strip()
@@ -0,0 +1,61 @@
+import threading
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Single-flight request coalescing.
+# Concurrent calls with the same key share one execution: the first caller
+# runs the function, everyone else waits for it and gets the same result
+# (or the same exception). Nothing is cached once the call finishes.
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0     # calls that actually ran the function
+        self.coalesced = 0    # calls that piggy-backed on an in-flight one
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                executed=self.executed,
+                coalesced=self.coalesced,
+                in_flight=len(self._calls),
+            )
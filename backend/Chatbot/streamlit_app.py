@@ -0,0 +1,61 @@
+import streamlit as st
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Shared Streamlit front-end for a single project, on top of Chatbot/bot.py.
+# Models and the FAISS index are loaded once per process (st.cache_resource),
+# not on every rerun, and only the user/assistant turns are kept as history,
+# capped at MAX_HISTORY messages, so the prompt doesn't grow turn after turn.
+
+MAX_HISTORY = 10  # user/assistant messages kept per browser session
+
+
+@st.cache_resource(show_spinner="Loading project knowledge base…")
+def load_engine(project: str):
+    from Chatbot import bot
+
+    bot.load_project(project)
+    return bot
+
+
+def _push(role: str, content: str):
+    history = st.session_state.history
+    history.append({"role": role, "content": content})
+    del history[:-MAX_HISTORY]
+
+
+def ask(engine, project: str, query: str) -> dict:
+    """One chat turn: bounded history + the new query -> engine -> history."""
+    result = engine.generate_response(
+        project, st.session_state.history + [{"role": "user", "content": query}]
+    )
+    _push("user", query)
+    _push("ai", result["text"])
+    return result
+
+
+def run_app(project: str):
+    st.set_page_config(page_title=f"{project} Chatbot", layout="centered")
+    st.title(f"🏡 {project} Chatbot")
+
+    engine = load_engine(project)
+    if "history" not in st.session_state:
+        st.session_state.history = []
+        st.session_state.last = None
+
+    query = st.text_input("Ask your question:")
+
+    if st.button("🔁 Reset Conversation"):
+        st.session_state.history = []
+        st.session_state.last = None
+        st.rerun()
+
+    if not query:
+        return
+    # text_input keeps its value across reruns; only answer a new question once
+    if st.session_state.last is None or st.session_state.last[0] != query:
+        st.session_state.last = (query, ask(engine, project, query))
+
+    result = st.session_state.last[1]
+    st.markdown(result["text"])
+    if result["image_url"]:
+        st.image(result["image_url"], use_container_width=True)
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Background warm-up + readiness for the chat engine. Chatbot/bot.py imports
+# LangChain / OpenAI / FAISS lazily, so the Flask app starts serving at once;
+# this thread pulls the heavy stack in, loads every project index, and makes
+# one embedding call so the HTTP pool is open before the first real query.
+#
+# Threads don't survive fork(): under gunicorn each worker starts its own
+# warm-up from the post_fork hook (backend/gunicorn.conf.py), and a process
+# forked from one that had started a warm-up doesn't inherit its state.
+_state = dict(started=None, finished=None, steps={}, errors={})
+_lock = threading.Lock()
+_thread = None
+_pid = None  # process that started _thread
+
+
+def _step(name: str, fn):
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        _state["errors"][name] = str(e)
+        print(f"[WARN] Warm-up step '{name}' failed: {e}")
+    _state["steps"][name] = round((time.perf_counter() - started) * 1000)
+
+
+def warm_up():
+    from Chatbot import bot
+
+    _state["started"] = time.time()
+    _step("clients", lambda: (bot._llm(), bot._embedding()))
+    for project in bot.PROJECTS:
+        _step(f"index:{project}", lambda p=project: bot.load_project(p))
+    if os.getenv("OPENAI_API_KEY"):
+        _step("embedding_call", lambda: bot._embedding().embed_query("warm up"))
+    _state["finished"] = time.time()
+
+
+def start_warmup() -> threading.Thread:
+    """Starts warm_up() once per process on a daemon thread."""
+    global _thread, _pid
+    with _lock:
+        if _thread is None or _pid != os.getpid():
+            _state.update(started=None, finished=None, steps={}, errors={})
+            _pid = os.getpid()
+            _thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def _after_fork_in_child():
+    global _lock, _thread, _pid
+    _lock = threading.Lock()  # another thread may have held it at fork time
+    if _thread is None:
+        return
+    # the parent's warm-up thread is gone; don't report it as running forever
+    _thread = _pid = None
+    _state.update(started=None, finished=None, steps={}, errors={})
+    from Chatbot import bot
+
+    # HTTP clients opened by the parent aren't safe to share across processes;
+    # FAISS indexes already loaded are (copy-on-write) and are kept
+    bot._llm.cache_clear()
+    bot._embedding.cache_clear()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def readiness() -> dict:
+    from Chatbot import bot
+
+    status = bot.warm_status()
+    ready = (
+        status["llm"] and status["embedding"]
+        and set(status["indexes"]) >= set(bot.PROJECTS)
+    )
+    return dict(
+        ready=ready,
+        **status,
+        warmup=dict(
+            running=_state["started"] is not None and _state["finished"] is None,
+            steps_ms=dict(_state["steps"]),
+            errors=dict(_state["errors"]),
+        ),
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# startup benchmark:  python -m Chatbot.warmup  (from backend/)
+# 1. `import app` wall time in a fresh interpreter (warm-up off)
+# 2. -X importtime breakdown of that import, by top-level package
+# 3. what the deferred stack costs: importing it, then a full warm_up()
+if __name__ == "__main__":
+    import subprocess
+    import sys
+    from collections import defaultdict
+
+    env = dict(os.environ, WARMUP="0")
+
+    def fresh(code: str) -> float:
+        out = subprocess.run(
+            [sys.executable, "-c", f"import time; t = time.perf_counter(); {code}; "
+                                   f"print(time.perf_counter() - t)"],
+            capture_output=True, text=True, env=env, check=True,
+        )
+        return float(out.stdout.strip().splitlines()[-1])
+
+    runs = sorted(fresh("import app") for _ in range(3))
+    print(f"import app (lazy engine):        {runs[1] * 1000:7.0f} ms (median of 3)")
+    heavy = "import langchain_openai, langchain_community.vectorstores, langchain_core.messages"
+    print(f"  + LangChain/OpenAI/FAISS stack: {fresh('import app; ' + heavy) * 1000:7.0f} ms")
+
+    trace = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True, text=True, env=env,
+    ).stderr
+    by_package = defaultdict(int)
+    for line in trace.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = (x.strip() for x in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            by_package[name.strip().split(".")[0]] += int(self_us)
+    print("\nimport app, self time by top-level package:")
+    for name, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:15]:
+        print(f"  {name:<28}{us / 1000:8.1f} ms")
+
+    started = time.perf_counter()
+    warm_up()
+    print(f"\nwarm_up(): {(time.perf_counter() - started) * 1000:.0f} ms, steps {_state['steps']}")
+    print(readiness())
@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dotenv import load_dotenv
+from Chatbot import faq
+from Chatbot.bot import PROJECTS
+
+#post-index ingestion step: (re)generates the precomputed FAQ answers for each
+#project once its FAISS index is in place. Up-to-date stores are left alone
+#unless --force is given.
+#   python Injest/injest.py [--project "Ramvan Villas"] [--force]
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build precomputed FAQ answer stores.")
+    parser.add_argument("--project", action="append", choices=PROJECTS,
+                        help="project to build (repeatable, default: all)")
+    parser.add_argument("--force", action="store_true",
+                        help="regenerate even if the stored version is current")
+    args = parser.parse_args()
+
+    for project in args.project or PROJECTS:
+        store = faq.build(project, force=args.force)
+        print(f"{project}: {len(store['entries'])} FAQ answers, version {store['version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from dotenv import load_dotenv
 from livekit import rtc
@@ -15,44 +16,109 @@ from livekit.agents import (
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from livekit.plugins import assemblyai
-from krupal_chatbot.chatbot import fetch_response
+from Chatbot.bot import retrieve_context, stream_response
+from STT.voice_pipeline import (
+    BargeInResponder,
+    LoopLagMonitor,
+    OpenAITTS,
+    SpeculativeRetriever,
+    aiter_in_thread,
+    speak_stream,
+)
 
 load_dotenv()
 
 logger = logging.getLogger("transcribe")
 logging.basicConfig(level=logging.INFO)
 
-async def speak_response(response_text: str, room: rtc.Room):
-    # Placeholder TTS logic
-    # Convert response_text to audio frames and publish to the room
-    # You must implement this with your TTS system.
-    # logger.info(f"Speaking response: {response_text}")
+VOICE_PROJECT = os.getenv("VOICE_PROJECT", "Krupal Habitat")
+MAX_HISTORY = 10  # user/assistant messages kept per participant
+LAG_LOG_INTERVAL = 30  # seconds between event-loop lag reports
+
+# LLM streams are blocking LangChain calls; keep them off the event loop
+llm_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("VOICE_LLM_WORKERS", "16")), thread_name_prefix="voice-llm"
+)
+
+
+async def publish_response_track(room: rtc.Room, tts, name: str = "response"):
+    """Publishes a LocalAudioTrack for the agent's voice; returns (source, publication)."""
+    source = rtc.AudioSource(tts.sample_rate, tts.num_channels)
+    track = rtc.LocalAudioTrack.create_audio_track(name, source)
+    options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+    publication = await room.local_participant.publish_track(track, options)
+    return source, publication
 
-    # Example if you have raw PCM frames
-    # Create a LocalAudioTrack
-    # You could use a generator that yields audio frames
-    # and write them into the LiveKit audio track.
 
-    # Example:
-    # audio_stream = your_tts_to_audio_stream(response_text)
-    # audio_track = rtc.LocalAudioTrack.create_audio_track("response", audio_stream)
-    # await room.local_participant.publish_track(audio_track)
+async def log_loop_lag(monitor: LoopLagMonitor):
+    while True:
+        await asyncio.sleep(LAG_LOG_INTERVAL)
+        logger.info(f"event-loop lag: {monitor.stats()}")
+
+
+async def speak_response(tokens, tts, source: rtc.AudioSource):
+    """Speaks an LLM token stream sentence by sentence into `source`."""
+
+    async def capture(pcm, sample_rate, num_channels, samples_per_channel):
+        await source.capture_frame(
+            rtc.AudioFrame(pcm, sample_rate, num_channels, samples_per_channel)
+        )
+
+    result = await speak_stream(tokens, tts, capture)
+    timings = {k: round(v * 1000) if v is not None else None
+               for k, v in result["timings"].items()}
+    logger.info(f"spoken in ms: {timings}")
+    return result["text"]
 
-    pass  # Replace with real implementation
 
 async def entrypoint(ctx: JobContext):
     logger.info(f"Starting transcriber (speech to text) example, room: {ctx.room.name}")
 
     stt_impl = assemblyai.STT()
+    tts_impl = OpenAITTS()
+    lag_monitor = LoopLagMonitor()
+    background = [asyncio.create_task(lag_monitor.run()),
+                  asyncio.create_task(log_loop_lag(lag_monitor))]
 
     async def transcribe_track(participant: rtc.RemoteParticipant, track: rtc.Track):
         logger.info(f"Started transcribing track for participant: {participant.identity}")
         audio_stream = rtc.AudioStream(track)
         stt_stream = stt_impl.stream()
+        history = []
+        # one voice track per participant so a barge-in only silences their answer
+        audio_source, publication = await publish_response_track(
+            ctx.room, tts_impl, f"response-{participant.identity}"
+        )
+
+        speculator = SpeculativeRetriever(
+            lambda query: retrieve_context(VOICE_PROJECT, query), executor=llm_executor
+        )
+
+        async def respond(user_query: str, context_task=None):
+            history.append({"role": "user", "content": user_query})
+            context = None
+            if context_task is not None:
+                try:
+                    context = await context_task
+                except Exception as e:
+                    logger.warning(f"speculative retrieval failed, retrying: {e}")
+            tokens = aiter_in_thread(
+                stream_response(VOICE_PROJECT, list(history), context), executor=llm_executor
+            )
+            response_text = await speak_response(tokens, tts_impl, audio_source)
+            logger.info(f"Response: {response_text}")
+            history.append({"role": "ai", "content": response_text})
+            del history[:-MAX_HISTORY]
+
+        def on_interrupt():
+            logger.info(f"barge-in: {participant.identity}")
+            audio_source.clear_queue()
+
+        responder = BargeInResponder(respond, on_interrupt)
 
         async def _handle_audio_stream():
             async for ev in audio_stream:
-                
+
                 stt_stream.push_frame(ev.frame)
 
         async def _handle_transcription_output():
@@ -61,20 +127,33 @@ async def entrypoint(ctx: JobContext):
                 if ev.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
                     user_query = ev.alternatives[0].text
                     logger.info(f"query: {participant.identity}: {user_query}")
-                    
-                    # Get AI response
-                    response_text = await fetch_response(user_query)
-                    logger.info(f"Response: {response_text}")
-                    print(f"Response: {response_text}")
-
-                    
-                    
-        await asyncio.gather(
-            _handle_audio_stream(),
-            _handle_transcription_output(),
-        )
+
+                    # answer in the background; a newer utterance cancels it
+                    await responder.submit(user_query, speculator.take(user_query))
+                    logger.info(f"speculative retrieval: {speculator.stats()}")
+                elif ev.type == stt.SpeechEventType.INTERIM_TRANSCRIPT:
+                    partial = ev.alternatives[0].text
+                    if partial.strip():
+                        # user started talking over the answer: stop speaking now
+                        if responder.busy:
+                            await responder.interrupt()
+                        speculator.on_interim(partial)
+
+        try:
+            await asyncio.gather(
+                _handle_audio_stream(),
+                _handle_transcription_output(),
+            )
+        finally:
+            await responder.close()
+            await ctx.room.local_participant.unpublish_track(publication.sid)
+
+    async def _stop_background():
+        for task in background:
+            task.cancel()
 
     await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+    ctx.add_shutdown_callback(_stop_background)
 
     @ctx.room.on("track_subscribed")
     def on_track_subscribed(
@@ -0,0 +1,524 @@
+import asyncio
+import difflib
+import math
+import statistics
+import re
+import struct
+import threading
+import time
+from collections import deque
+from contextlib import suppress
+
+from Chatbot.resolver import strip_image_tags
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Streaming voice pipeline: LLM tokens -> sentences -> TTS -> audio frames.
+# Sentences are handed to TTS as soon as they are complete, so the first one
+# is playing while the LLM is still writing the rest of the answer.
+# Nothing in here depends on LiveKit; the agent plugs in a sink that writes
+# into an rtc.AudioSource.
+
+FRAME_MS = 20
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])[\"')\]]*\s+|\n+")
+# "Rs. 5000", "approx. 10", "No. 3" are not sentence ends
+_ABBREVIATIONS = ("rs.", "no.", "sq.", "approx.", "dr.", "mr.", "mrs.", "st.", "vs.", "e.g.", "i.e.")
+_MARKDOWN = re.compile(r"[*_`#>|]+")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_BULLET = re.compile(r"^\s*(?:[-•]|\d+[.)])\s+", re.MULTILINE)
+_WORDS = re.compile(r"\w+")
+
+
+def clean_for_speech(text: str) -> str:
+    text = strip_image_tags(text)
+    text = _LINK.sub(r"\1", text)
+    text = _BULLET.sub("", text)
+    text = _MARKDOWN.sub("", text)
+    return " ".join(text.split())
+
+
+class SentenceSegmenter:
+    """
+    push() tokens in, get back the sentences completed so far.
+    Very short fragments are held back and merged with the next sentence
+    so TTS isn't called for "Sure." on its own.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def push(self, token: str) -> list[str]:
+        self._buf += token
+        out = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buf):
+            candidate = self._buf[start:match.end()]
+            words = candidate.split()
+            if words and words[-1].lower() in _ABBREVIATIONS:
+                continue
+            sentence = clean_for_speech(candidate)
+            if len(sentence) < self.min_chars:
+                continue
+            out.append(sentence)
+            start = match.end()
+        self._buf = self._buf[start:]
+        return out
+
+    def flush(self) -> list[str]:
+        sentence = clean_for_speech(self._buf)
+        self._buf = ""
+        return [sentence] if sentence else []
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# TTS backends: synthesize(text) yields raw 16-bit little-endian PCM chunks
+class TTSBackend:
+    sample_rate = 24000
+    num_channels = 1
+
+    async def synthesize(self, text: str):
+        """Async generator of PCM chunks for `text`."""
+        raise NotImplementedError
+
+
+class OpenAITTS(TTSBackend):
+    """OpenAI speech endpoint; response_format=pcm is 24 kHz mono int16."""
+
+    def __init__(self, model: str = "gpt-4o-mini-tts", voice: str = "alloy"):
+        from openai import AsyncOpenAI
+
+        self._client = AsyncOpenAI()
+        self.model = model
+        self.voice = voice
+
+    async def synthesize(self, text: str):
+        async with self._client.audio.speech.with_streaming_response.create(
+            model=self.model, voice=self.voice, input=text, response_format="pcm"
+        ) as response:
+            async for chunk in response.iter_bytes(4800):
+                yield chunk
+
+
+class FakeTTS(TTSBackend):
+    """
+    Offline stand-in: waits `first_byte_s`, then emits a quiet tone lasting
+    `seconds_per_char` per character, produced `realtime_factor` x faster
+    than playback.
+    """
+
+    def __init__(self, first_byte_s: float = 0.15, seconds_per_char: float = 0.06,
+                 realtime_factor: float = 0.2):
+        self.first_byte_s = first_byte_s
+        self.seconds_per_char = seconds_per_char
+        self.realtime_factor = realtime_factor
+        # 100 ms of a 200 Hz tone (a whole number of periods), reused for every chunk
+        n = self.sample_rate // 10
+        self._tone = struct.pack(
+            f"<{n}h", *(int(800 * math.sin(2 * math.pi * 200 * i / self.sample_rate)) for i in range(n))
+        )
+
+    async def synthesize(self, text: str):
+        await asyncio.sleep(self.first_byte_s)
+        remaining = int(len(text) * self.seconds_per_char * self.sample_rate) * 2
+        while remaining > 0:
+            chunk = self._tone[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+            await asyncio.sleep(len(chunk) / 2 / self.sample_rate * self.realtime_factor)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# LLM token sources
+def fake_llm_stream(text: str, first_token_s: float = 0.6, token_s: float = 0.03):
+    """Blocking generator that replays `text` word by word like a chat model."""
+    time.sleep(first_token_s)
+    for word in re.findall(r"\S+\s*", text):
+        yield word
+        time.sleep(token_s)
+
+
+async def aiter_in_thread(sync_iterable, stop: threading.Event = None, executor=None):
+    """
+    Runs a blocking generator (e.g. bot.stream_response) on a worker thread
+    (from `executor` if given) and yields its items on the event loop.
+    Setting `stop` (or cancelling the consumer) makes the worker stop
+    pulling from the generator.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = stop or threading.Event()
+    done = object()
+
+    def send(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # loop already closed
+            stop.set()
+
+    def pump():
+        try:
+            for item in sync_iterable:
+                if stop.is_set():
+                    break
+                send(item)
+        except Exception as e:
+            send(e)
+        finally:
+            send(done)
+
+    if executor is not None:
+        loop.run_in_executor(executor, pump)
+    else:
+        threading.Thread(target=pump, name="llm-stream", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+class _Framer:
+    """Re-chunks arbitrary PCM byte chunks into fixed FRAME_MS frames."""
+
+    def __init__(self, sample_rate: int, num_channels: int):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.samples_per_frame = sample_rate * FRAME_MS // 1000
+        self.frame_bytes = self.samples_per_frame * num_channels * 2
+        self._buf = b""
+
+    def push(self, chunk: bytes):
+        self._buf += chunk
+        while len(self._buf) >= self.frame_bytes:
+            frame, self._buf = self._buf[:self.frame_bytes], self._buf[self.frame_bytes:]
+            yield frame
+
+    def flush(self):
+        if self._buf:
+            yield self._buf.ljust(self.frame_bytes, b"\0")
+            self._buf = b""
+
+
+async def speak_stream(tokens, tts: TTSBackend, capture) -> dict:
+    """
+    tokens:  async iterator of LLM text chunks
+    capture: async fn(pcm: bytes, sample_rate, num_channels, samples_per_channel)
+    Returns the spoken text and timings (seconds since the call started).
+    """
+    start = time.perf_counter()
+    timings = dict(first_token=None, first_sentence=None, first_audio=None, done=None)
+    sentences = asyncio.Queue()
+    text_parts = []
+
+    def mark(name):
+        if timings[name] is None:
+            timings[name] = time.perf_counter() - start
+
+    async def produce():
+        segmenter = SentenceSegmenter()
+        try:
+            async for token in tokens:
+                mark("first_token")
+                text_parts.append(token)
+                for sentence in segmenter.push(token):
+                    mark("first_sentence")
+                    await sentences.put(sentence)
+            for sentence in segmenter.flush():
+                mark("first_sentence")
+                await sentences.put(sentence)
+        finally:
+            await sentences.put(None)
+
+    producer = asyncio.create_task(produce())
+    framer = _Framer(tts.sample_rate, tts.num_channels)
+    try:
+        while (sentence := await sentences.get()) is not None:
+            async for chunk in tts.synthesize(sentence):
+                for frame in framer.push(chunk):
+                    mark("first_audio")
+                    await capture(frame, framer.sample_rate, framer.num_channels,
+                                  framer.samples_per_frame)
+        for frame in framer.flush():
+            await capture(frame, framer.sample_rate, framer.num_channels,
+                          framer.samples_per_frame)
+        await producer  # re-raise LLM errors
+    finally:
+        producer.cancel()
+    mark("done")
+    return dict(text="".join(text_parts), timings=timings)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+class BargeInResponder:
+    """
+    One in-flight answer per participant. submit() cancels whatever is still
+    being generated or spoken (and calls `on_interrupt`, e.g. to drop queued
+    audio) before starting the answer to the new utterance.
+    """
+
+    def __init__(self, respond, on_interrupt=None):
+        self._respond = respond          # async fn(query)
+        self._on_interrupt = on_interrupt
+        self._task = None
+        self.interrupted = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def interrupt(self):
+        if not self.busy:
+            return
+        self._task.cancel()
+        self.interrupted += 1
+        with suppress(asyncio.CancelledError):
+            await self._task
+        if self._on_interrupt:
+            self._on_interrupt()
+
+    async def submit(self, *args):
+        await self.interrupt()
+        self._task = asyncio.create_task(self._respond(*args))
+        return self._task
+
+    async def close(self):
+        await self.interrupt()
+
+
+def transcript_similarity(a: str, b: str) -> float:
+    a_words = _WORDS.findall(a.lower())
+    b_words = _WORDS.findall(b.lower())
+    if not a_words or not b_words:
+        return 0.0
+    return difflib.SequenceMatcher(None, a_words, b_words).ratio()
+
+
+class SpeculativeRetriever:
+    """
+    Starts retrieval from interim transcripts so it is (mostly) done by the
+    time the final transcript arrives.
+
+    on_interim(text)  debounced; each new interim replaces the pending one
+    take(final_text)  returns a task resolving to the speculative context if
+                      the transcript it was built from is close enough to
+                      the final one, else None (caller retrieves as usual)
+    """
+
+    def __init__(self, retrieve, executor=None, debounce_s: float = 0.25,
+                 min_similarity: float = 0.8, min_words: int = 3):
+        self._retrieve = retrieve        # blocking fn(query) -> context
+        self._executor = executor
+        self.debounce_s = debounce_s
+        self.min_similarity = min_similarity
+        self.min_words = min_words
+        self._pending = None             # debounce timer task
+        self._spec = None                # (text, started_at, future)
+        self.hits = 0
+        self.misses = 0
+        self.saved_s = 0.0
+
+    def on_interim(self, text: str):
+        if len(_WORDS.findall(text)) < self.min_words:
+            return
+        if self._spec and transcript_similarity(self._spec[0], text) >= 0.95:
+            return  # already retrieving for (almost) this text
+        if self._pending:
+            self._pending.cancel()
+        self._pending = asyncio.create_task(self._debounced(text))
+
+    async def _debounced(self, text: str):
+        await asyncio.sleep(self.debounce_s)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._timed_retrieve, text)
+        self._discard()
+        self._spec = (text, loop.time(), future)
+
+    def _timed_retrieve(self, text: str):
+        started = time.perf_counter()
+        return self._retrieve(text), time.perf_counter() - started
+
+    def _discard(self):
+        if self._spec:
+            # a running executor job can't be stopped; its result is just dropped
+            self._spec[2].cancel()
+            self._spec = None
+
+    def take(self, final_text: str):
+        if self._pending:
+            self._pending.cancel()
+            self._pending = None
+        spec, self._spec = self._spec, None
+        if spec is None:
+            return None
+        text, started, future = spec
+        if transcript_similarity(text, final_text) < self.min_similarity:
+            future.cancel()
+            self.misses += 1
+            return None
+        self.hits += 1
+        # retrieval time that is no longer on the post-utterance critical path
+        if future.done() and not future.exception():
+            self.saved_s += future.result()[1]
+        else:
+            self.saved_s += asyncio.get_running_loop().time() - started
+        return asyncio.ensure_future(self._context(future))
+
+    @staticmethod
+    async def _context(future):
+        context, _ = await future
+        return context
+
+    def stats(self) -> dict:
+        return dict(hits=self.hits, misses=self.misses,
+                    saved_ms=round(self.saved_s * 1000))
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep."""
+
+    def __init__(self, interval: float = 0.05, window: int = 2000):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def stats(self) -> dict:
+        if not self.samples:
+            return dict(p50_ms=0.0, p99_ms=0.0, max_ms=0.0)
+        ordered = sorted(self.samples)
+        return dict(
+            p50_ms=round(statistics.median(ordered) * 1000, 1),
+            p99_ms=round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1),
+            max_ms=round(ordered[-1] * 1000, 1),
+        )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# offline benchmarks:  python -m STT.voice_pipeline  (from backend/)
+SAMPLE_ANSWER = (
+    "Krupal Habitat is a premium plotting project in Dholera, Gujarat. "
+    "Plots start at ₹8,000 per sq yard plus ₹1,500 development charges. "
+    "A 200 sq yard plot therefore costs ₹19,00,000 in total. "
+    "You pay 10% of BSP at booking, 20% on BBA and 70% at registry. "
+    "All legal documents are available for review, and I can arrange a site visit this week. "
+    "IMAGE: payment plan"
+)
+
+
+async def _bench(runs: int = 3):
+    async def null_capture(*_):
+        pass
+
+    for label in ("streaming", "wait-for-full-answer"):
+        first_audio = []
+        for _ in range(runs):
+            tts = FakeTTS()
+            start = time.perf_counter()
+            tokens = aiter_in_thread(fake_llm_stream(SAMPLE_ANSWER))
+            if label == "streaming":
+                result = await speak_stream(tokens, tts, null_capture)
+                first_audio.append(result["timings"]["first_audio"])
+            else:
+                full = "".join([t async for t in tokens])
+                waited = time.perf_counter() - start
+
+                async def one_shot():
+                    yield full
+
+                result = await speak_stream(one_shot(), tts, null_capture)
+                first_audio.append(waited + result["timings"]["first_audio"])
+        print(f"{label:>22}: first audio after {sum(first_audio) / runs * 1000:7.1f} ms "
+              f"(avg of {runs})")
+
+
+async def _inline(sync_iterable):
+    # the old behaviour: blocking LLM calls made directly on the event loop
+    for item in sync_iterable:
+        yield item
+
+
+async def _bench_participants(participants: int = 20, off_loop: bool = True):
+    """Every participant asks, barges in 0.3 s later, and waits for the answer."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=participants * 2)
+    monitor = LoopLagMonitor(interval=0.01)
+    lag_task = asyncio.create_task(monitor.run())
+
+    async def null_capture(*_):
+        await asyncio.sleep(0)
+
+    async def participant():
+        async def respond(query):
+            llm = fake_llm_stream(SAMPLE_ANSWER, first_token_s=0.3, token_s=0.01)
+            tokens = aiter_in_thread(llm, executor=executor) if off_loop else _inline(llm)
+            await speak_stream(tokens, FakeTTS(realtime_factor=0.05), null_capture)
+
+        responder = BargeInResponder(respond)
+        await responder.submit("first question")
+        await asyncio.sleep(0.3)
+        task = await responder.submit("second question")
+        await task
+        return responder.interrupted
+
+    interrupted = sum(await asyncio.gather(*(participant() for _ in range(participants))))
+    lag_task.cancel()
+    executor.shutdown(wait=False, cancel_futures=True)
+    label = "off-loop" if off_loop else "on-loop (old)"
+    print(f"{label:>14}: {participants} participants, {interrupted} barge-ins, "
+          f"event-loop lag {monitor.stats()}")
+
+
+async def _bench_speculation(runs: int = 5, retrieval_s: float = 0.35,
+                             word_gap_s: float = 0.15, endpointing_s: float = 0.4):
+    """Time from FINAL_TRANSCRIPT until retrieved context is available."""
+    loop = asyncio.get_running_loop()
+    words = "what is the total cost of a 200 sq yard plot".split()
+    final = " ".join(words)
+
+    def fake_retrieve(query):
+        time.sleep(retrieval_s)  # embedding round-trip + FAISS search
+        return f"context for {query}"
+
+    for speculate in (False, True):
+        waits = []
+        spec = SpeculativeRetriever(fake_retrieve)
+        for _ in range(runs):
+            for i in range(1, len(words) + 1):
+                if speculate:
+                    spec.on_interim(" ".join(words[:i]))
+                await asyncio.sleep(word_gap_s)
+            await asyncio.sleep(endpointing_s)  # silence until the final transcript
+            started = loop.time()
+            task = spec.take(final) if speculate else None
+            if task:
+                await task
+            else:
+                await loop.run_in_executor(None, fake_retrieve, final)
+            waits.append(loop.time() - started)
+        label = "speculative" if speculate else "final-only"
+        print(f"{label:>14}: context ready {sum(waits) / runs * 1000:6.1f} ms after final "
+              f"transcript {spec.stats() if speculate else ''}")
+
+
+async def _main():
+    await _bench()
+    await _bench_participants(off_loop=True)
+    await _bench_participants(off_loop=False)
+    await _bench_speculation()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,14 +1,25 @@
+import os
 from flask import Flask
 from flask_cors import CORS
-from database import db
+from werkzeug.middleware.proxy_fix import ProxyFix
+from database import db, upgrade_schema
 from routes.customer_routes import customer_bp
 
 from routes.ai_message_route import ai_bp
+from Chatbot.warmup import start_warmup
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///customers.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# behind nginx / a load balancer request.remote_addr is the proxy, so every
+# client would share one per-IP rate limit. TRUSTED_PROXIES = number of proxy
+# hops in front of the app whose X-Forwarded-For is trusted (0 = none, the
+# header is client-controlled and ignored).
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", "0"))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
 
 CORS(app, resources={r"/ai/*": {"origins": "http://localhost:3000"}})
 
@@ -20,6 +31,12 @@ app.register_blueprint(customer_bp, url_prefix='/customers')
 app.register_blueprint(ai_bp, url_prefix='/ai')
 with app.app_context():
     db.create_all()
+    upgrade_schema()  # columns added to existing tables since they were created
+
+# load LLM clients + FAISS indexes in the background; /ai/ready reports progress.
+# Under gunicorn every worker starts its own from post_fork (gunicorn.conf.py)
+if os.getenv("WARMUP", "1") != "0" and not os.getenv("WARMUP_IN_WORKERS"):
+    start_warmup()
 
 if __name__ == '__main__':
     app.run(debug=True)
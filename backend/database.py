@@ -1,3 +1,31 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+
+def upgrade_schema():
+    """
+    Adds model columns (and their indexes) missing from tables that already
+    exist. create_all() only creates new tables, so an older customers.db
+    would otherwise fail with "no such column". Safe to run on every start.
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        missing = [c for c in table.columns if c.name not in existing]
+        if not missing:
+            continue
+        with db.engine.begin() as conn:
+            for column in missing:
+                # no DEFAULT clause: SQLite can't add a column with a non-constant
+                # one; new rows get theirs from the model's column default
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'
+                ))
+                print(f"[INFO] Added column {table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
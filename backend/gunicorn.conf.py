@@ -0,0 +1,16 @@
+import os
+
+# gunicorn settings, picked up automatically when started from backend/:
+#   gunicorn app:app [--preload] [-w 4]
+# Threads don't survive the fork into workers, so app.py skips its import-time
+# warm-up here (it would run in the master with --preload) and every worker
+# starts its own once it has been forked.
+
+os.environ["WARMUP_IN_WORKERS"] = "1"
+
+
+def post_fork(server, worker):
+    if os.getenv("WARMUP", "1") != "0":
+        from Chatbot.warmup import start_warmup
+
+        start_warmup()
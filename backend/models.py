@@ -6,6 +6,8 @@ class Customer(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     phone = db.Column(db.String(20), nullable=True)
     project_id = db.Column(db.String(100), nullable=True)  # ✅ NEW FIELD
+    created_at = db.Column(db.DateTime, default=db.func.now(),
+                           server_default=db.func.now(), index=True)
 
     def to_dict(self):
         return {
@@ -13,7 +15,8 @@ class Customer(db.Model):
             "name": self.name,
             "email": self.email,
             "phone": self.phone,
-            "project_id": self.project_id
+            "project_id": self.project_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
 class AIMessage(db.Model):
@@ -23,6 +26,7 @@ class AIMessage(db.Model):
     user_id    = db.Column(db.String(36),  nullable=False)
     session_id = db.Column(db.String(36),  nullable=False, index=True)
     role       = db.Column(db.String(10),  nullable=False)       # "user" | "ai"
+    project_name = db.Column(db.String(100), nullable=True, index=True)
     message    = db.Column(db.Text,      nullable=False)
     timestamp  = db.Column(db.DateTime,  server_default=db.func.now())
 
@@ -32,6 +36,7 @@ class AIMessage(db.Model):
             "user_id": self.user_id,
             "session_id": self.session_id,
             "role": self.role,
+            "project_name": self.project_name,
             "message": self.message,
             "timestamp": self.timestamp.isoformat()
         }
\ No newline at end of file
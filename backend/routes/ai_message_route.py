@@ -1,10 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import select
 from models  import AIMessage
 from database import db
-from Chatbot.bot import generate_response
+from Chatbot.bot import (generate_response, generate_multi_response,
+                         engine_stats, ALL_PROJECTS)
+from Chatbot.llm_router import LLMTimeout, LLMUnavailable
+from Chatbot.warmup import readiness
+from utils.rate_limit import admission, RateLimited
+from utils.record_io import (stream_records, parse_export_args, export_authorized,
+                             EXPORT_MIMETYPES)
 
 ai_bp = Blueprint("ai_routes", __name__)
 
+# rows fetched per round-trip from the server-side cursor during exports
+EXPORT_BATCH_SIZE = 1000
+
+
+def _too_many(e: RateLimited):
+    resp = jsonify(error=str(e))
+    resp.headers["Retry-After"] = e.retry_after_header
+    return resp, 429
+
 # ──────────────────────────────────────────────────────────────────────────────
 @ai_bp.route("/new_query", methods=["POST"])
 def new_query():
@@ -13,14 +29,27 @@ def new_query():
     user_id      = data.get("user_id")
     session_id   = data.get("session_id")
     project_name = data.get("project_name", "Krupal Habitat")  # default
+    projects     = data.get("projects")    # list -> comparison mode
     user_msg     = (data.get("message") or "").strip()
 
     if not all([user_id, session_id, user_msg]):
         return jsonify(error="user_id, session_id, message required"), 400
 
+    compare = project_name == ALL_PROJECTS or (isinstance(projects, list) and len(projects) > 1)
+    if compare:
+        projects = projects if isinstance(projects, list) and projects else None
+        project_name = ", ".join(projects) if projects else ALL_PROJECTS
+
+    # per user / IP / project buckets, before anything is written.
+    # remote_addr is the client only with TRUSTED_PROXIES set behind a proxy (app.py)
+    try:
+        admission.check(user_id, request.remote_addr, project_name)
+    except RateLimited as e:
+        return _too_many(e)
+
     # save user message
     user_row = AIMessage(user_id=user_id, session_id=session_id,
-                        role="user", message=user_msg)
+                        project_name=project_name, role="user", message=user_msg)
     db.session.add(user_row)
 
     # pull last 19 previous msgs (so + current user = 20)
@@ -34,15 +63,29 @@ def new_query():
     history = [{"role": r.role, "content": r.message} for r in history_rows]
     history.append({"role": "user", "content": user_msg})
 
-    # LLM
-    bot = generate_response(project_name, history)
+    # LLM calls inside wait for one of the global in-flight slots; cached,
+    # routed and coalesced answers don't take one
+    try:
+        if compare:
+            bot = generate_multi_response(projects, history)
+        else:
+            bot = generate_response(project_name, history)
+    except RateLimited as e:
+        db.session.rollback()
+        return _too_many(e)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify(error=str(e)), 400
+    except (LLMTimeout, LLMUnavailable) as e:
+        db.session.rollback()
+        return jsonify(error=f"Assistant unavailable: {e}"), 503
     ai_row = AIMessage(user_id=user_id, session_id=session_id,
-                    role="ai", message=bot["text"])
+                    project_name=project_name, role="ai", message=bot["text"])
     db.session.add(ai_row)
     db.session.commit()
     print(f"AI Response: {bot['image_url']}")
     return jsonify(user=user_row.to_dict(), ai=ai_row.to_dict(),
-                image_url=bot["image_url"]), 200
+                image_url=bot["image_url"], images=bot.get("images")), 200
 
 # ──────────────────────────────────────────────────────────────────────────────
 @ai_bp.route("/get_messages/<string:user_id>/<string:session_id>", methods=["GET"])
@@ -52,3 +95,55 @@ def get_messages(user_id, session_id):
             .order_by(AIMessage.timestamp)
             .all())
     return jsonify([r.to_dict() for r in rows]), 200
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+@ai_bp.route("/stats", methods=["GET"])
+def stats():
+    return jsonify(dict(engine_stats(), admission=admission.stats())), 200
+
+# ──────────────────────────────────────────────────────────────────────────────
+@ai_bp.route("/ready", methods=["GET"])
+def ready():
+    """200 once clients and every project index are loaded, else 503."""
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
+
+# ──────────────────────────────────────────────────────────────────────────────
+@ai_bp.route("/export", methods=["GET"])
+def export_messages():
+    """
+    Streams chat messages as CSV or NDJSON, oldest first.
+    Needs the X-Export-Token header.
+    Query: format=csv|ndjson, project_name, user_id, session_id,
+           since / until (ISO dates on timestamp).
+    """
+    if not export_authorized(request.headers):
+        return jsonify(error="Unauthorized"), 401
+    try:
+        fmt, since, until = parse_export_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    stmt = select(AIMessage).order_by(AIMessage.timestamp, AIMessage.id)
+    for field in ("project_name", "user_id", "session_id"):
+        if request.args.get(field):
+            stmt = stmt.where(getattr(AIMessage, field) == request.args[field])
+    if since:
+        stmt = stmt.where(AIMessage.timestamp >= since)
+    if until:
+        stmt = stmt.where(AIMessage.timestamp < until)
+
+    def rows():
+        result = db.session.execute(
+            stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).scalars()
+        for msg in result:
+            yield msg.to_dict()
+
+    fields = ["id", "user_id", "session_id", "project_name", "role", "message", "timestamp"]
+    return Response(
+        stream_with_context(stream_records(rows(), fmt, fields)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename=ai_messages.{fmt}"},
+    )
@@ -1,9 +1,21 @@
-from flask import Blueprint, request, jsonify
+import csv
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models import Customer
 from database import db
+from utils.record_io import (iter_records, chunked, stream_records,
+                             parse_export_args, export_authorized, EXPORT_MIMETYPES)
 
 customer_bp = Blueprint('customer_routes', __name__)
 
+# rows per upsert statement (4 bound params per row keeps us under SQLite's limit)
+BULK_CHUNK_SIZE = 200
+# rows fetched per round-trip from the server-side cursor during exports
+EXPORT_BATCH_SIZE = 1000
+
 @customer_bp.route('/', methods=['POST'])
 def add_customer():
     data = request.get_json()
@@ -23,4 +35,166 @@ def add_customer():
     db.session.add(new_customer)
     db.session.commit()
 
-    return jsonify(new_customer.to_dict()), 201
\ No newline at end of file
+    return jsonify(new_customer.to_dict()), 201
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+BULK_FIELDS = ("name", "email", "phone", "project_id")
+# column limits, checked up front: Postgres rejects over-long values (SQLite doesn't)
+MAX_LENGTHS = {k: Customer.__table__.c[k].type.length for k in BULK_FIELDS}
+
+
+def _clean_row(raw):
+    if not isinstance(raw, dict):
+        return None, "Record must be an object"
+    if raw.get("__error__"):
+        return None, raw["__error__"]
+    # CSV gives strings, JSON may give numbers (phone) or nulls
+    row = {k: str(raw.get(k) or "").strip() or None for k in BULK_FIELDS}
+    if not row["name"] or not row["email"]:
+        return None, "Name and email are required"
+    for k, limit in MAX_LENGTHS.items():
+        if row[k] and limit and len(row[k]) > limit:
+            return None, f"{k} longer than {limit} characters"
+    return row, None
+
+
+def _upsert_stmt(rows, dialect: str):
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = insert(Customer).values(rows)
+    # blank phone / project in the import never wipes what we already have
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Customer.email],
+        set_=dict(
+            name=stmt.excluded.name,
+            phone=func.coalesce(stmt.excluded.phone, Customer.phone),
+            project_id=func.coalesce(stmt.excluded.project_id, Customer.project_id),
+        ),
+    )
+    if dialect == "postgresql":
+        # xmax is 0 only on row versions this statement inserted
+        stmt = stmt.returning(Customer.email, literal_column("(xmax = 0)").label("inserted"))
+    return stmt
+
+
+def _write_rows(rows, dialect: str) -> set:
+    """
+    Upserts `rows` and returns the emails it inserted (the rest were updated).
+    Decided by the writes themselves, so two imports racing on the same
+    email can't both report it as created.
+    """
+    if dialect == "postgresql":
+        result = db.session.execute(_upsert_stmt(rows, dialect))
+        return {email for email, inserted in result if inserted}
+    # no xmax elsewhere: DO NOTHING returns exactly the rows it inserted,
+    # then the remaining ones are upserted
+    created = set(db.session.execute(
+        sqlite_insert(Customer).values(rows)
+        .on_conflict_do_nothing(index_elements=[Customer.email])
+        .returning(Customer.email)
+    ).scalars())
+    rest = [r for r in rows if r["email"] not in created]
+    if rest:
+        db.session.execute(_upsert_stmt(rest, dialect))
+    return created
+
+
+def _upsert_chunk(chunk, offset):
+    results = [None] * len(chunk)
+    latest = {}  # email -> position of the row that wins inside this chunk
+
+    for i, raw in enumerate(chunk):
+        row, error = _clean_row(raw)
+        if error:
+            results[i] = {"row": offset + i, "status": "error", "error": error}
+            continue
+        if row["email"] in latest:
+            prev = latest[row["email"]]
+            results[prev] = {"row": offset + prev, "email": row["email"], "status": "superseded"}
+        latest[row["email"]] = i
+        results[i] = row
+
+    if not latest:
+        return results
+
+    rows = [results[i] for i in latest.values()]
+    try:
+        created = _write_rows(rows, db.engine.dialect.name)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        # the whole chunk is one statement: report its rows, keep going with the next
+        db.session.rollback()
+        error = f"Database error: {getattr(e, 'orig', None) or e}"
+        for i, r in enumerate(results):
+            if r.get("status") != "error":
+                results[i] = {"row": offset + i, "email": r["email"], "status": "error",
+                              "error": error}
+        return results
+
+    for email, i in latest.items():
+        results[i] = {
+            "row": offset + i,
+            "email": email,
+            "status": "created" if email in created else "updated",
+        }
+    return results
+
+
+@customer_bp.route('/bulk', methods=['POST'])
+def bulk_upsert_customers():
+    """
+    Upserts leads on their unique email.
+    Body: JSON array, CSV or NDJSON (or a multipart `file` upload of either).
+    Returns one result per input row, in input order.
+    """
+    results = []
+    try:
+        for chunk in chunked(iter_records(request), BULK_CHUNK_SIZE):
+            results.extend(_upsert_chunk(chunk, len(results)))
+    except (ValueError, csv.Error) as e:
+        db.session.rollback()
+        return jsonify(error=str(e), processed=len(results), results=results), 400
+
+    summary = {}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    return jsonify(processed=len(results), summary=summary, results=results), 200
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+@customer_bp.route('/export', methods=['GET'])
+def export_customers():
+    """
+    Streams customers as CSV or NDJSON. Needs the X-Export-Token header.
+    Query: format=csv|ndjson, project_id, since / until (ISO dates on created_at).
+    Customers created before the created_at column was added have it NULL, so
+    any since / until filter leaves them out; export without one to get them.
+    """
+    if not export_authorized(request.headers):
+        return jsonify(error="Unauthorized"), 401
+    try:
+        fmt, since, until = parse_export_args(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    stmt = select(Customer).order_by(Customer.id)
+    if request.args.get("project_id"):
+        stmt = stmt.where(Customer.project_id == request.args["project_id"])
+    if since:
+        stmt = stmt.where(Customer.created_at >= since)
+    if until:
+        stmt = stmt.where(Customer.created_at < until)
+
+    def rows():
+        result = db.session.execute(
+            stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).scalars()
+        for customer in result:
+            yield customer.to_dict()
+
+    fields = ["id", "name", "email", "phone", "project_id", "created_at"]
+    return Response(
+        stream_with_context(stream_records(rows(), fmt, fields)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename=customers.{fmt}"},
+    )
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("WARMUP", "0")
+os.environ.setdefault("FAQ_AUTO_BUILD", "0")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+
+@pytest.fixture
+def app():
+    from flask import Flask
+    from database import db
+    from routes.ai_message_route import ai_bp
+    from routes.customer_routes import customer_bp
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["TESTING"] = True
+    db.init_app(app)
+    app.register_blueprint(customer_bp, url_prefix="/customers")
+    app.register_blueprint(ai_bp, url_prefix="/ai")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class FakeEmbeddings:
+    """Stable per-text vectors, no network."""
+
+    def embed_query(self, text):
+        import hashlib
+
+        seed = hashlib.sha256(text.encode()).digest()
+        return [(seed[i % 32] - 127.5) / 127.5 for i in range(1536)]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+def scripted_answer(messages):
+    """GREETING/QUERY for the greeting check, a fixed answer otherwise."""
+    prompt = messages[-1].content
+    if prompt.startswith('Reply "GREETING"'):
+        return "GREETING" if '"hi"' in prompt.lower() else "QUERY"
+    return "The total price of the plot is 40,50,000 including development charges."
+
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    """bot.py wired to a scripted FakeProvider and fake embeddings."""
+    from Chatbot import bot, faq
+    from Chatbot.llm_router import FakeProvider, LLMRouter
+
+    provider = FakeProvider("fake", respond=scripted_answer)
+    monkeypatch.setattr(bot, "router", LLMRouter([provider]))
+    monkeypatch.setattr(bot, "_embedding", FakeEmbeddings)
+    monkeypatch.setattr(faq, "has_store", lambda project: False)
+    return provider
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from Chatbot import bot
+from Chatbot.llm_router import LLMRouter
+from utils.rate_limit import AdmissionController, MemoryBuckets, MemoryGate, RateLimited
+
+
+@pytest.fixture
+def gated(monkeypatch, fake_engine):
+    """bot.router behind a 4-slot admission gate with a slow scripted LLM."""
+    admission = AdmissionController(MemoryBuckets(), MemoryGate(4), queue_timeout=0.05)
+    fake_engine.first_token_s = 0.2
+    monkeypatch.setattr(bot, "router", LLMRouter([fake_engine], admit=admission.slot))
+    return admission
+
+
+def _concurrently(n, fn):
+    barrier = threading.Barrier(n)
+
+    def call(_):
+        barrier.wait()
+        try:
+            return fn()
+        except RateLimited as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(call, range(n)))
+
+
+def test_coalesced_callers_do_not_hold_slots(gated, fake_engine):
+    history = [{"role": "user", "content": "What is the total price of a plot?"}]
+    results = _concurrently(20, lambda: bot.generate_response("Ramvan Villas", history))
+
+    assert not [r for r in results if isinstance(r, RateLimited)]
+    assert len({r["text"] for r in results}) == 1
+    assert fake_engine.calls == 2  # one greeting check + one answer, for all 20 callers
+    assert gated.stats()["queue_timeout"] == 0
+    assert gated.gate.in_flight == 0
+
+
+def test_answers_without_llm_skip_the_gate(gated, fake_engine):
+    for _ in range(4):
+        gated.gate.acquire(0)  # every slot taken
+    result = bot.generate_response(
+        "Ramvan Villas", [{"role": "user", "content": "show me the villa"}]
+    )
+    assert result["image_url"]
+    assert fake_engine.calls == 0
+
+
+def test_distinct_queries_beyond_the_cap_are_turned_away(gated, fake_engine):
+    results = _concurrently(8, lambda: bot.generate_response(
+        "Ramvan Villas",
+        [{"role": "user", "content": f"Tell me about plot {threading.get_ident()}"}],
+    ))
+    limited = [r for r in results if isinstance(r, RateLimited)]
+    assert limited and len(limited) < 8
+    assert gated.gate.in_flight == 0
+
+
+
+def test_full_buckets_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.rate_limit.time.monotonic", lambda: now[0])
+    buckets = MemoryBuckets(sweep_interval=60)
+    for ip in range(100):
+        assert buckets.take([(f"ip:{ip}", 1.0, 5)])[0]
+    buckets.take([("ip:busy", 0.001, 5)])  # takes ~1000s to refill one token
+    assert len(buckets._state) == 101
+
+    now[0] += 61  # others refilled to burst, sweep is due
+    assert buckets.take([("user:x", 1.0, 5)])[0]
+    assert set(buckets._state) == {"ip:busy", "user:x"}
+    # a bucket that is not full keeps its debt
+    allowed = [buckets.take([("ip:busy", 0.001, 5)])[0] for _ in range(5)]
+    assert allowed == [True, True, True, True, False]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from Chatbot.compact_index import RescoredIndex, _quantize, load_store, prepare
+
+
+def _vectors(n=300, d=32, dupes=40, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, d)).astype("float32")
+    vectors[n - dupes:] = vectors[:dupes]  # exact duplicate chunks, as in the Krupal index
+    return vectors
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_rescored_search_matches_flat_index(storage):
+    vectors = _vectors()
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    index = RescoredIndex(_quantize(vectors, flat.metric_type, storage), vectors, factor=4)
+
+    queries = np.concatenate([vectors[:20], vectors[100:120] + 0.01]).astype("float32")
+    D_flat, I_flat = flat.search(queries, 5)
+    D, I = index.search(queries, 5)
+
+    assert np.array_equal(I, I_flat)  # same chunks, same order, ties included
+    assert np.allclose(D, D_flat, atol=1e-4)
+
+
+def test_search_with_k_above_ntotal_pads_like_faiss():
+    vectors = _vectors(n=6, dupes=0)
+    index = RescoredIndex(_quantize(vectors, faiss.METRIC_L2, "float16"), vectors)
+    _, I = index.search(vectors[:1], 10)
+    assert list(I[0, 6:]) == [-1] * 4 and I[0, 0] == 0
+
+
+def test_prepare_and_load_store(tmp_path):
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    vectors = _vectors(n=50, dupes=5)
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    docs = {str(i): Document(page_content=f"chunk {i}") for i in range(len(vectors))}
+    FAISS(None, flat, InMemoryDocstore(docs), {i: str(i) for i in range(len(vectors))}) \
+        .save_local(str(tmp_path))
+
+    prepare(str(tmp_path), "int8")
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "index.faiss", "index.int8.faiss", "index.pkl", "vectors.f32.npy"]  # no tmp files left
+    store = load_store(str(tmp_path), None, storage="int8")
+    hits = store.similarity_search_with_score_by_vector(vectors[7].tolist(), k=3)
+    assert hits[0][0].page_content == "chunk 7"
@@ -0,0 +1,121 @@
+import io
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DataError
+
+from routes import customer_routes
+
+
+def test_bulk_upsert_creates_updates_and_supersedes(client):
+    rows = [
+        {"name": "Asha", "email": "asha@example.com", "phone": 98765},
+        {"name": "Ravi", "email": "ravi@example.com"},
+        {"name": "Asha K", "email": "asha@example.com"},
+        {"email": "nobody@example.com"},
+    ]
+    resp = client.post("/customers/bulk", json=rows)
+    assert resp.status_code == 200
+    statuses = [r["status"] for r in resp.get_json()["results"]]
+    assert statuses == ["superseded", "created", "created", "error"]
+
+    resp = client.post("/customers/bulk", json=[{"name": "Ravi S", "email": "ravi@example.com"}])
+    assert resp.get_json()["results"][0]["status"] == "updated"
+
+
+def test_bulk_rejects_values_longer_than_the_column(client):
+    rows = [
+        {"name": "x" * 101, "email": "long@example.com"},
+        {"name": "Ok", "email": "e" * 121},
+        {"name": "Fine", "email": "fine@example.com"},
+    ]
+    results = client.post("/customers/bulk", json=rows).get_json()["results"]
+    assert results[0] == {"row": 0, "status": "error", "error": "name longer than 100 characters"}
+    assert results[1]["error"] == "email longer than 120 characters"
+    assert results[2]["status"] == "created"
+
+
+def test_database_error_is_reported_per_row_of_the_failed_chunk(client, monkeypatch):
+    monkeypatch.setattr(customer_routes, "BULK_CHUNK_SIZE", 2)
+    real_write = customer_routes._write_rows
+    calls = []
+
+    def failing_second_chunk(rows, dialect):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise DataError("INSERT ...", {}, Exception("value too long"))
+        return real_write(rows, dialect)
+
+    monkeypatch.setattr(customer_routes, "_write_rows", failing_second_chunk)
+    rows = [{"name": f"n{i}", "email": f"u{i}@example.com"} for i in range(5)]
+    resp = client.post("/customers/bulk", json=rows)
+
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == ["created", "created", "error", "error", "created"]
+    assert "value too long" in results[2]["error"]
+    assert results[3]["email"] == "u3@example.com"
+
+
+def _statuses(resp):
+    return [r["status"] for r in resp.get_json()["results"]]
+
+
+def test_csv_body(client):
+    body = ("name,email,phone,project_id\n"
+            "Asha,asha@example.com,98765,Ramvan Villas\n"
+            "Ravi,ravi@example.com,,\n"
+            ",nobody@example.com,,\n")
+    resp = client.post("/customers/bulk", data=body, content_type="text/csv; charset=utf-8")
+    assert resp.status_code == 200
+    assert _statuses(resp) == ["created", "created", "error"]
+
+    customer = customer_routes.Customer.query.filter_by(email="asha@example.com").one()
+    assert (customer.phone, customer.project_id) == ("98765", "Ramvan Villas")
+
+
+def test_ndjson_bad_line_is_reported_and_the_rest_imported(client):
+    body = ('{"name": "Asha", "email": "asha@example.com"}\n'
+            '{"name": "Broken", "email": \n'
+            "\n"
+            '{"name": "Ravi", "email": "ravi@example.com"}\n')
+    resp = client.post("/customers/bulk", data=body, content_type="application/x-ndjson")
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == ["created", "error", "created"]
+    assert results[1]["error"].startswith("line 2:")
+
+
+@pytest.mark.parametrize("filename, content, mimetype", [
+    ("leads.csv", b"name,email\nAsha,asha@example.com\nRavi,ravi@example.com\n", "text/csv"),
+    ("leads.ndjson", b'{"name":"Asha","email":"asha@example.com"}\n'
+                     b'{"name":"Ravi","email":"ravi@example.com"}\n', "application/octet-stream"),
+    ("leads.json", b'[{"name":"Asha","email":"asha@example.com"},'
+                   b'{"name":"Ravi","email":"ravi@example.com"}]', "application/json"),
+])
+def test_multipart_upload(client, filename, content, mimetype):
+    resp = client.post("/customers/bulk", content_type="multipart/form-data",
+                       data={"file": (io.BytesIO(content), filename, mimetype)})
+    assert resp.status_code == 200
+    assert _statuses(resp) == ["created", "created"]
+
+
+def test_unsupported_body_is_rejected(client):
+    resp = client.post("/customers/bulk", data="name=Asha", content_type="text/plain")
+    assert resp.status_code == 400
+    assert "Unsupported content type" in resp.get_json()["error"]
+
+
+def test_created_and_updated_in_one_chunk(client):
+    client.post("/customers/bulk", json=[{"name": "Asha", "email": "asha@example.com"}])
+    resp = client.post("/customers/bulk", json=[{"name": "Asha K", "email": "asha@example.com"},
+                                                {"name": "Ravi", "email": "ravi@example.com"}])
+    assert _statuses(resp) == ["updated", "created"]
+
+
+def test_postgres_upsert_reports_inserts_from_xmax():
+    stmt = customer_routes._upsert_stmt([{"name": "Asha", "email": "asha@example.com",
+                                          "phone": None, "project_id": None}], "postgresql")
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (email) DO UPDATE" in sql
+    assert sql.rstrip().endswith("RETURNING customer.email, (xmax = 0) AS inserted")
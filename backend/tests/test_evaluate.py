@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from Chatbot import bot, evaluate, faq
+
+CASES = os.path.join(os.path.dirname(evaluate.__file__), "eval_cases.jsonl")
+
+
+@pytest.fixture
+def offline(monkeypatch, tmp_path):
+    """evaluate.install() in offline mode, undone after the test."""
+    for name in ("_embedding", "router", "_ask_llm"):
+        monkeypatch.setattr(bot, name, getattr(bot, name))
+    monkeypatch.setattr(faq, "FAQ_AUTO_BUILD", faq.FAQ_AUTO_BUILD)
+    cache = evaluate.StageCache(str(tmp_path / "cache.json"))
+    evaluate.install(cache, live=False)
+    return cache
+
+
+def _cases():
+    with open(CASES, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_offline_run_passes_the_sample_cases(offline):
+    rows = evaluate.run(_cases(), concurrency=4)
+    failed = {r["id"]: (r["error"], r["checks"], r["answer"]) for r in rows if not r["passed"]}
+    assert not failed
+    assert all(r["scripted"] for r in rows if r["llm_calls"])
+    assert offline.counts["llm_misses"] > 0 and not offline.dirty  # nothing recorded offline
+
+
+def test_scripted_answer_quotes_the_prompt():
+    from langchain_core.messages import HumanMessage
+
+    prompt = bot.RAMVAN_PROMPT.format(context="Registration: | ₹80,000 (250 sq. yd)",
+                                      query="What are the registration charges?",
+                                      image_keywords="villa")
+    answer = evaluate.scripted_answer([HumanMessage(content=prompt)])
+    assert "80,000" in answer
+    greeting = 'Reply "GREETING" if "hello there" is just a greeting/ vague, else "QUERY":'
+    assert evaluate.scripted_answer([HumanMessage(content=greeting)]) == "GREETING"
+
+
+def test_live_expectations_are_skipped_for_scripted_answers():
+    case = dict(project="Krupal Habitat",
+                expect=dict(facts=["bsp"], live=dict(numbers=["25,65,000"])))
+    result = dict(text="BSP per sq yard", image_url=None)
+    assert evaluate.check(case, result, live=False) == {"fact:bsp": True}
+    assert evaluate.check(case, result, live=True) == {"fact:bsp": True,
+                                                       "number:25,65,000": False}
+
+
+def test_default_cache_lives_under_tmp(tmp_path):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(evaluate.__file__)))
+    assert os.path.relpath(evaluate.DEFAULT_CACHE, backend).split(os.sep)[0] == "tmp"
+
+    cache = evaluate.StageCache(str(tmp_path / "tmp" / "eval_cache.json"))  # dir not there yet
+    cache.data["llm"]["k"] = dict(text="answer", latency_s=0.1)
+    cache.dirty = True
+    cache.save()
+    assert evaluate.StageCache(cache.path).data["llm"] == {"k": dict(text="answer", latency_s=0.1)}
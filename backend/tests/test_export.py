@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from database import db
+from models import AIMessage, Customer
+from utils import record_io
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def exports(app, monkeypatch):
+    monkeypatch.setattr(record_io, "EXPORT_API_TOKEN", TOKEN)
+    db.session.add(Customer(name="Asha", email="asha@example.com"))
+    db.session.add(AIMessage(user_id="u1", session_id="s1", role="user",
+                             project_name="Ramvan Villas", message="hi"))
+    db.session.commit()
+
+
+@pytest.mark.parametrize("url", ["/customers/export", "/ai/export"])
+@pytest.mark.parametrize("headers", [{}, {"X-Export-Token": "wrong"}])
+def test_export_needs_the_token(client, exports, url, headers):
+    resp = client.get(url, headers=headers)
+    assert resp.status_code == 401
+    assert b"asha" not in resp.data and b"hi" not in resp.data
+
+
+@pytest.mark.parametrize("url", ["/customers/export", "/ai/export"])
+def test_export_is_off_without_a_configured_token(client, exports, monkeypatch, url):
+    monkeypatch.setattr(record_io, "EXPORT_API_TOKEN", None)
+    assert client.get(url, headers={"X-Export-Token": ""}).status_code == 401
+
+
+def test_export_with_the_token(client, exports):
+    resp = client.get("/customers/export", headers={"X-Export-Token": TOKEN})
+    assert resp.status_code == 200
+    assert json.loads(resp.data.splitlines()[0])["email"] == "asha@example.com"
+
+    resp = client.get("/ai/export?format=csv", headers={"X-Export-Token": TOKEN})
+    assert resp.status_code == 200
+    assert resp.data.splitlines()[0].startswith(b"id,user_id,session_id")
+
+
+def test_since_leaves_out_customers_without_created_at(client, exports):
+    db.session.add(Customer(name="Old", email="old@example.com"))
+    db.session.commit()
+    db.session.execute(Customer.__table__.update()
+                       .where(Customer.email == "old@example.com").values(created_at=None))
+    db.session.commit()
+
+    everyone = client.get("/customers/export", headers={"X-Export-Token": TOKEN}).data
+    since = client.get("/customers/export?since=2000-01-01",
+                       headers={"X-Export-Token": TOKEN}).data
+    assert b"old@example.com" in everyone and b"old@example.com" not in since
@@ -0,0 +1,162 @@
+import json
+import time
+
+import pytest
+
+from Chatbot import bot, faq
+from Chatbot.llm_router import LLMRouter
+from utils.rate_limit import AdmissionController, MemoryBuckets, MemoryGate, RateLimited
+
+from conftest import FakeEmbeddings
+
+PROJECT = "Ramvan Villas"
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """A served FAQ store whose question vectors are the fake embeddings."""
+    embed = FakeEmbeddings()
+    entries = [
+        dict(question=q, text=f"stored: {q}", image_url=None,
+             vector=faq._normalise(embed.embed_query(q)))
+        for q in faq.questions_for(PROJECT)
+    ]
+    monkeypatch.setattr(faq, "_current", lambda project: dict(entries=entries))
+    return embed
+
+
+def _ask(embed, query, asked_as=None):
+    # query vector of `asked_as` = the nearest neighbour a real embedding would find
+    return faq.match(PROJECT, embed.embed_query(asked_as or query), query)
+
+
+def test_close_query_is_served(store):
+    hit = _ask(store, "What is the price breakdown of a plot?")
+    assert hit["text"] == "stored: What is the price breakdown of a plot?"
+
+
+@pytest.mark.parametrize("query", [
+    "What is the price breakdown of a 300 sq yard plot?",
+    "price breakdown of a corner plot",
+    "Is there an EMI payment plan?",
+    "What is the price breakdown of 2 plots?",
+])
+def test_query_with_extra_specifics_is_not_served(store, query):
+    nearest = "What is the payment plan?" if "payment" in query else \
+        "What is the price breakdown of a plot?"
+    assert _ask(store, query, asked_as=nearest) is None
+
+
+def test_project_name_is_not_a_qualifier(store):
+    hit = _ask(store, "price breakdown of a plot at Ramvan Villas",
+               asked_as="What is the price breakdown of a plot?")
+    assert hit is not None
+
+
+def test_small_talk_is_not_embedded(fake_engine, store, monkeypatch):
+    calls = []
+    fake_engine.respond = lambda messages: "GREETING"
+    monkeypatch.setattr(faq, "has_store", lambda project: True)
+    monkeypatch.setattr(FakeEmbeddings, "embed_query",
+                        lambda self, text: calls.append(text) or [0.0] * 1536)
+
+    bot.generate_response(PROJECT, [{"role": "user", "content": "hi"}])
+    bot.generate_response(PROJECT, [{"role": "user", "content": "hello, good morning"}])
+    assert calls == []
+    assert faq.worth_matching(PROJECT, "What is the payment plan?")
+
+
+def test_labels_point_at_real_questions():
+    labels = faq.load_labels()
+    assert labels
+    for lab in labels:
+        assert lab["faq"] is None or lab["faq"] in faq.questions_for(lab["project"]), lab
+
+
+def test_sweep_reports_every_threshold():
+    labels = faq.load_labels()
+    rows = faq.sweep(labels, FakeEmbeddings().embed_documents, [0.5, 0.92, 1.01])
+    assert [r["threshold"] for r in rows] == [0.5, 0.92, 1.01]
+    for r in rows:
+        assert r["correct"] + r["wrong"] + r["missed"] <= len(labels)
+    # nothing clears a threshold above 1
+    assert rows[-1]["correct"] == rows[-1]["wrong"] == 0
+
+
+def test_rebuild_goes_through_the_admission_cap(fake_engine, monkeypatch, tmp_path):
+    admission = AdmissionController(MemoryBuckets(), MemoryGate(1), queue_timeout=0.01)
+    monkeypatch.setattr(bot, "router", LLMRouter([fake_engine], admit=admission.slot))
+    monkeypatch.setattr(faq, "_store_path", lambda project: str(tmp_path / "faq.json"))
+    admission.gate.acquire(0)  # the only slot is taken by live traffic
+
+    with pytest.raises(RateLimited):
+        faq.build(PROJECT, force=True)
+    assert fake_engine.calls == 0
+
+
+def test_canned_replies_are_not_stored(fake_engine, monkeypatch, tmp_path):
+    monkeypatch.setattr(faq, "_store_path", lambda project: str(tmp_path / "faq.json"))
+    monkeypatch.setattr(bot, "_violates_policy",
+                        lambda text, project=None: "payment plan" in text.lower())
+    monkeypatch.setattr(bot, "_is_greeting", lambda text, history: "located" in text)
+
+    store = faq.build(PROJECT, force=True)
+    stored = [e["question"] for e in store["entries"]]
+    assert "What is the payment plan?" not in stored
+    assert "Where is Ramvan Villas located?" not in stored
+    assert len(stored) == len(faq.questions_for(PROJECT)) - 2
+
+
+@pytest.fixture
+def rebuilds(monkeypatch, tmp_path):
+    """Synchronous background rebuilds into tmp_path; returns the build() calls."""
+    calls = []
+    monkeypatch.setattr(faq, "_store_path", lambda project: str(tmp_path / "faq.json"))
+    monkeypatch.setattr(faq, "FAQ_AUTO_BUILD", True)
+    monkeypatch.setattr(faq, "_stores", {})
+    monkeypatch.setattr(faq, "_retry", {})
+    monkeypatch.setattr(faq, "_schedule_rebuild", faq._rebuild)
+    return calls
+
+
+def test_failed_rebuild_is_retried_with_backoff(rebuilds, monkeypatch):
+    def failing(project, force=False, wait=True):
+        rebuilds.append(project)
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(faq, "build", failing)
+    assert faq._current(PROJECT) is None
+    assert faq._current(PROJECT) is None  # retry not due yet
+    assert len(rebuilds) == 1
+    failures, at = faq._retry[PROJECT]
+    assert failures == 1 and at - time.monotonic() == pytest.approx(faq.FAQ_RETRY_S, abs=1)
+
+    faq._retry[PROJECT] = (1, 0)  # retry due
+    faq._current(PROJECT)
+    failures, at = faq._retry[PROJECT]
+    assert failures == 2 and at - time.monotonic() == pytest.approx(2 * faq.FAQ_RETRY_S, abs=1)
+
+    def working(project, force=False, wait=True):
+        rebuilds.append(project)
+        store = dict(project=project, version=faq.store_version(project), entries=[])
+        with open(faq._store_path(project), "w", encoding="utf-8") as f:
+            json.dump(store, f)
+        return store
+
+    monkeypatch.setattr(faq, "build", working)
+    faq._retry[PROJECT] = (2, 0)
+    faq._current(PROJECT)
+    assert PROJECT not in faq._retry
+    assert faq._current(PROJECT) == dict(project=PROJECT, version=faq.store_version(PROJECT),
+                                         entries=[])
+    assert len(rebuilds) == 3
+
+
+@pytest.mark.skipif(faq.fcntl is None, reason="needs fcntl")
+def test_only_one_process_builds(fake_engine, rebuilds):
+    with faq._build_lock(PROJECT):  # another worker is building
+        with pytest.raises(BlockingIOError):
+            faq.build(PROJECT, force=True, wait=False)
+        assert faq._current(PROJECT) is None
+    assert fake_engine.calls == 0
+    assert faq._retry[PROJECT][0] == 0  # not counted as a failure
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from Chatbot.llm_router import FakeProvider, LLMRouter, LLMTimeout, LLMUnavailable
+
+
+def _timed(router):
+    started = time.monotonic()
+    text = router.invoke([])
+    return text, time.monotonic() - started
+
+
+def test_single_provider_answers():
+    router = LLMRouter([FakeProvider("only", "hello there")])
+    assert router.invoke([]) == "hello there"
+    assert router.stats()["hedged"] == 0
+
+
+def test_hedge_starts_backup_when_primary_is_slow():
+    slow = FakeProvider("primary", "slow answer", first_token_s=2.0)
+    fast = FakeProvider("secondary", "fast answer", first_token_s=0.05)
+    router = LLMRouter([slow, fast], hedge_after_s=0.1)
+
+    text, took = _timed(router)
+
+    assert text == "fast answer"
+    assert took < 1.0
+    assert router.hedged == 1
+    assert router.stats()["providers"]["secondary"]["wins"] == 1
+
+
+def test_no_hedge_when_primary_is_fast():
+    primary = FakeProvider("primary", "primary answer")
+    backup = FakeProvider("secondary", "backup answer")
+    router = LLMRouter([primary, backup], hedge_after_s=0.5)
+
+    assert router.invoke([]) == "primary answer"
+    assert backup.calls == 0
+
+
+def test_failover_on_error_without_waiting_for_hedge():
+    broken = FakeProvider("primary", fail=True)
+    backup = FakeProvider("secondary", "fallback answer")
+    router = LLMRouter([broken, backup], hedge_after_s=5.0)
+
+    text, took = _timed(router)
+
+    assert text == "fallback answer"
+    assert took < 1.0
+    assert router.stats()["providers"]["primary"]["errors"] == 1
+
+
+def test_all_providers_failing_raises_unavailable():
+    router = LLMRouter([FakeProvider("a", fail=True), FakeProvider("b", fail=True)])
+    with pytest.raises(LLMUnavailable, match="a failed.*b failed"):
+        router.invoke([])
+
+
+def test_breaker_opens_then_half_opens_after_cooldown():
+    broken = FakeProvider("primary", fail=True)
+    backup = FakeProvider("secondary", "fallback answer")
+    router = LLMRouter([broken, backup], breaker_threshold=2, breaker_cooldown_s=0.2)
+
+    for _ in range(2):
+        assert router.invoke([]) == "fallback answer"
+    assert router.breakers["primary"].state == "open"
+
+    # open: the primary is skipped entirely
+    assert router.invoke([]) == "fallback answer"
+    assert broken.calls == 2
+
+    time.sleep(0.25)
+    assert router.breakers["primary"].state == "half-open"
+    # half-open: one trial call; failing it re-opens the circuit straight away
+    assert router.invoke([]) == "fallback answer"
+    assert broken.calls == 3
+    assert router.breakers["primary"].state == "open"
+
+    time.sleep(0.25)
+    broken.fail = False
+    broken.text = "primary is back"
+    assert router.invoke([]) == "primary is back"
+    assert router.breakers["primary"].state == "closed"
+
+
+def test_deadline_raises_timeout():
+    router = LLMRouter([FakeProvider("only", first_token_s=2.0)], deadline_s=0.2)
+    started = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        router.invoke([])
+    assert time.monotonic() - started < 1.0
+
+
+def test_deadline_covers_hedged_attempts_too():
+    router = LLMRouter(
+        [FakeProvider("a", first_token_s=2.0), FakeProvider("b", first_token_s=2.0)],
+        hedge_after_s=0.05, deadline_s=0.3,
+    )
+    with pytest.raises(LLMTimeout):
+        router.invoke([])
+    assert router.hedged == 1
+
+
+def test_per_call_deadline_overrides_default():
+    router = LLMRouter([FakeProvider("only", "late", first_token_s=0.3)], deadline_s=0.1)
+    assert router.invoke([], deadline_s=2.0) == "late"
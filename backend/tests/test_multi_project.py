@@ -0,0 +1,109 @@
+import pytest
+from langchain_core.documents import Document
+
+from Chatbot import bot
+from Chatbot.context import count_tokens
+
+PROJECTS = ["Krupal Habitat", "Ramvan Villas", "Firefly Homes"]
+
+
+def _chunk(tag: str, words: int = 40) -> str:
+    # distinct vocabulary per chunk, so only intended repeats look alike
+    return " ".join(f"{tag}{i}" for i in range(words))
+
+
+def _hit(distance: float, project: str, text: str):
+    return (distance, project, Document(page_content=text))
+
+
+def _sections(context: str) -> dict:
+    out = {}
+    for block in context.split("\n\n"):
+        head, _, body = block.partition("\n")
+        out[head.removeprefix("### ")] = body.split("\n")
+    return out
+
+
+def test_every_project_gets_its_best_chunk_first():
+    hits = [_hit(0.1 + i / 100, "Krupal Habitat", _chunk(f"k{i}x")) for i in range(6)]
+    hits += [_hit(0.9, "Ramvan Villas", _chunk("rbest")), _hit(1.2, "Ramvan Villas", _chunk("r2x")),
+             _hit(0.8, "Firefly Homes", _chunk("fbest"))]
+    budget = sum(count_tokens(_chunk(t)) for t in ("rbest", "fbest", "k0x", "k1x"))
+
+    sections = _sections(bot._pack_multi_context(hits, PROJECTS, budget))
+    assert list(sections) == PROJECTS  # grouped in the requested order
+    assert sections["Ramvan Villas"] == [_chunk("rbest")]
+    assert sections["Firefly Homes"] == [_chunk("fbest")]
+    # the rest of the budget goes to the globally closest chunks
+    assert sections["Krupal Habitat"] == [_chunk("k0x"), _chunk("k1x")]
+
+
+def test_budget_is_shared_across_projects():
+    hits = [_hit(i / 10, p, _chunk(f"{p[0]}{i}x")) for i in range(5) for p in PROJECTS]
+    budget = 7 * max(count_tokens(h[2].page_content) for h in hits)
+    context = bot._pack_multi_context(hits, PROJECTS, budget)
+    chunks = [c for body in _sections(context).values() for c in body]
+    assert 7 <= len(chunks) < len(hits)
+    assert sum(count_tokens(c) for c in chunks) <= budget
+
+
+def test_first_chunk_is_kept_even_over_budget():
+    context = bot._pack_multi_context([_hit(0.5, "Ramvan Villas", _chunk("r", 400))],
+                                      PROJECTS, 10)
+    assert _sections(context) == {"Ramvan Villas": [_chunk("r", 400)]}
+
+
+def test_repeats_are_dropped_within_a_project_only():
+    shared = _chunk("same")
+    hits = [_hit(0.1, "Krupal Habitat", shared), _hit(0.2, "Krupal Habitat", shared),
+            _hit(0.3, "Krupal Habitat", shared + " "), _hit(0.4, "Ramvan Villas", shared)]
+    sections = _sections(bot._pack_multi_context(hits, PROJECTS, 10_000))
+    assert sections == {"Krupal Habitat": [shared], "Ramvan Villas": [shared]}
+
+
+def test_no_hits_is_an_empty_context():
+    assert bot._pack_multi_context([], PROJECTS, 1000) == ""
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+RAMVAN_VILLA = bot.PROJECT_IMAGES["Ramvan Villas"]["villa"]
+KRUPAL_HOUSE = bot.PROJECT_IMAGES["Krupal Habitat"]["house"]
+
+
+@pytest.mark.parametrize("answer, images", [
+    ("Both.\nIMAGE: Ramvan Villas: villa\nIMAGE: Krupal Habitat: house",
+     {"Ramvan Villas": RAMVAN_VILLA, "Krupal Habitat": KRUPAL_HOUSE}),
+    ("Both.\n**IMAGE: ramvan villas: Villas**", {"Ramvan Villas": RAMVAN_VILLA}),
+    ("Both.\nIMAGE: Ramvan Villas: villa\nIMAGE: Ramvan Villas: bedroom",
+     {"Ramvan Villas": RAMVAN_VILLA}),                        # first tag per project wins
+    ("Both.\nIMAGE: villa", {}),                              # no project prefix
+    ("Both.\nIMAGE: Sunrise Towers: villa", {}),              # unknown project
+    ("Both.\nIMAGE: Firefly Homes: clubhouse", {}),           # not being compared
+    ("Both.\nIMAGE: Krupal Habitat: swimming pool", {}),      # unknown keyword
+])
+def test_project_images_are_parsed_and_tags_stripped(answer, images):
+    text, found = bot._parse_project_images(answer, ["Ramvan Villas", "Krupal Habitat"])
+    assert text == "Both." and found == images
+
+
+def test_comparison_packs_every_project_and_returns_their_images(fake_engine):
+    prompts = []
+
+    def respond(messages):
+        prompt = messages[-1].content
+        if prompt.startswith('Reply "GREETING"'):
+            return "QUERY"
+        prompts.append(prompt)
+        return "Both have plots.\nIMAGE: Ramvan Villas: villa\nIMAGE: Krupal Habitat: house"
+
+    fake_engine.respond = respond
+    result = bot.generate_multi_response(
+        ["Krupal Habitat", "Ramvan Villas"],
+        [{"role": "user", "content": "Compare the payment plans of both projects"}],
+    )
+    assert len(prompts) == 1
+    assert "### Krupal Habitat" in prompts[0] and "### Ramvan Villas" in prompts[0]
+    assert "### Firefly Homes" not in prompts[0]
+    assert result["text"] == "Both have plots."
+    assert result["images"] == {"Ramvan Villas": RAMVAN_VILLA, "Krupal Habitat": KRUPAL_HOUSE}
+    assert result["image_url"] == RAMVAN_VILLA
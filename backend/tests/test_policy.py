@@ -0,0 +1,107 @@
+import pytest
+
+from Chatbot.policy import PolicyFilter, policy_for
+
+RAMVAN_ANSWER = (
+    "Ramvan Villas is close to popular spots like the Garjiya Temple, the Kosi "
+    "River and Jim Corbett's Bijrani gate, about 15 minutes away."
+)
+# a filter that does block "temple", to exercise the allowlist mechanics
+STRICT = PolicyFilter({"religion": ["temple", "church"]},
+                      ["garjiya temple", "garjiya devi temple", "temple town"])
+
+
+def _stream(policy: PolicyFilter, text: str, size: int) -> dict:
+    check = policy.stream()
+    for i in range(0, len(text), size):
+        if check.feed(text[i:i + size])["blocked"]:
+            return check.result
+    return check.finish()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 11, 26, 1000])
+def test_allowed_phrase_survives_any_chunking(size):
+    result = _stream(STRICT, RAMVAN_ANSWER, size)
+    assert not result["blocked"], result
+
+
+@pytest.mark.parametrize("size", [1, 4, 9, 1000])
+def test_blocked_term_still_caught_across_chunks(size):
+    text = RAMVAN_ANSWER + " Also there is a famous temple nearby."
+    result = _stream(STRICT, text, size)
+    assert result["blocked"] and result["category"] == "religion"
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_blocked_phrase_caught_across_chunks(size):
+    text = "Sure. Honestly, you should vote for the party that builds roads."
+    assert _stream(policy_for("Krupal Habitat"), text, size)["category"] == "politics"
+
+
+def test_trailing_term_is_settled_by_finish():
+    check = STRICT.stream()
+    assert not check.feed("It is next to the temple")["blocked"]  # may become "temple town"
+    assert check.finish()["blocked"]
+
+
+def test_allowlist_is_per_project():
+    ramvan = PolicyFilter({"religion": ["temple"]}, ["garjia devi temple"])
+    assert not ramvan.violates("Visit the Garjia Devi Temple.")
+    assert PolicyFilter({"religion": ["temple"]}).violates("Visit the Garjia Devi Temple.")
+
+
+def test_allowed_landmarks_are_masked_for_the_classifier():
+    seen = []
+    policy = PolicyFilter({"sex": ["xxx"]}, ["st. mary's church"],
+                          classifier=lambda text: seen.append(text) or 0.0)
+    policy.check("St. Mary's Church is 2 km from Firefly Homes.")
+    assert "church" not in seen[0].lower()
+
+
+@pytest.mark.parametrize("text", [
+    "The plot is 1515 sq ft.",
+    "Plot No. 1515 is available.",
+    "Call 5105 or 1535 for a site visit.",
+    "Total: 40,50,000 for 450 sq yards.",
+])
+def test_numbers_are_not_deleeted(text):
+    assert not policy_for("Krupal Habitat").violates(text)
+
+
+@pytest.mark.parametrize("text", ["want some s3x", "buy h3roin", "p0rn links", "1s1s attack"])
+def test_leet_inside_words_is_caught(text):
+    assert policy_for("Krupal Habitat").violates(text)
+
+
+# real buyer questions and bot answers that must go through
+@pytest.mark.parametrize("project, text", [
+    ("Krupal Habitat", "The villa comes with a water and electricity hookup."),
+    ("Krupal Habitat", "Dholera is PM Modi's flagship smart city project."),
+    ("Krupal Habitat", "Will the election affect prices?"),
+    ("Krupal Habitat", "Is the political situation in Gujarat stable for investment?"),
+    ("Krupal Habitat", "Dholera is seeing explosive growth in land prices."),
+    ("Ramvan Villas", "Is there any temple near the project?"),
+    ("Ramvan Villas", "Is there a medical store or drug store nearby?"),
+    ("Ramvan Villas", "any crime or murder cases?"),
+    ("Ramvan Villas", "Is it safe? Any thefts or crime in Ramnagar?"),
+    ("Ramvan Villas", "Nearby you have the Garjia Devi Temple and the Kosi River."),
+    ("Ramvan Villas", "Sitabani Temple is a short drive into the forest."),
+    ("Ramvan Villas", "Kainchi Dham and Hanuman Dham are popular with visitors."),
+    ("Firefly Homes", "St. Mary's Church in Lansdowne is a 10-minute walk."),
+    ("Firefly Homes", "Tarkeshwar Dham and the Garhwal Rifles War Memorial are nearby."),
+    ("Firefly Homes", "Is there a church or mosque in Lansdowne?"),
+    ("Firefly Homes", "Can I grow vegetables, or will weeds be a problem?"),
+])
+def test_domain_text_is_allowed(project, text):
+    assert not policy_for(project).violates(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Which religion is better, Hindu or Muslim?",
+    "Who should I vote for, BJP or Congress party?",
+    "Where can I buy drugs around here?",
+    "I will kill you",
+    "send nudes",
+])
+def test_off_topic_and_abusive_text_is_blocked(text):
+    assert policy_for("Ramvan Villas").violates(text)
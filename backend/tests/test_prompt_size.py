@@ -0,0 +1,30 @@
+from Chatbot import bot
+from Chatbot.context import count_tokens
+
+LONG_ANSWER = "The payment plan is 10% on booking, 20% on BBA and 70% on registry. " * 20
+
+
+def test_prompt_tokens_stay_flat_over_a_long_chat(fake_engine):
+    sizes = []
+
+    def respond(messages):
+        prompt = messages[-1].content
+        if prompt.startswith('Reply "GREETING"'):
+            return "QUERY"
+        sizes.append(sum(count_tokens(m.content) for m in messages))
+        return LONG_ANSWER
+
+    fake_engine.respond = respond
+    history = []
+    for _ in range(40):
+        # same question every turn, so retrieval is identical and only history varies
+        history.append({"role": "user", "content": "What is the payment plan?"})
+        result = bot.generate_response("Ramvan Villas", history)
+        history.append({"role": "ai", "content": result["text"]})
+
+    assert len(sizes) == 40
+    capped = sizes[bot.MAX_HISTORY_MESSAGES // 2:]
+    # once the history window is full every turn costs the same
+    assert len(set(capped)) == 1
+    assert max(sizes) == capped[0]
+    assert sizes[0] < capped[0]
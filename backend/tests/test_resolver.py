@@ -0,0 +1,80 @@
+import pytest
+
+from Chatbot.resolver import KeywordResolver, strip_image_tags
+
+IMAGES = {
+    "Bedroom": "https://img/bedroom.jpg",
+    "living room": "https://img/living.jpg",
+    "villa": "https://img/villa.jpg",
+    "payment plan": "https://img/payment.jpg",
+}
+RESOLVER = KeywordResolver(IMAGES)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("show me the bedroom", dict(intent="image", keyword="bedroom")),
+    ("Show me the BEDROOM please", dict(intent="image", keyword="bedroom")),
+    ("pictures of the bedrooms", dict(intent="image", keyword="bedroom")),       # plural
+    ("can I see the livingroom", dict(intent="image", keyword="living room")),   # no space
+    ("show   living\troom", dict(intent="image", keyword="living room")),
+    ("photos of the villas", dict(intent="image", keyword="villa")),
+    ("show me the payment plan", dict(intent="image", keyword="payment plan")),  # image wins
+    ("where is the project?", dict(intent="map", keyword=None)),
+    ("send location", dict(intent="map", keyword=None)),
+    ("how do i reach", dict(intent="map", keyword=None)),
+])
+def test_short_single_intent_queries_are_routed(query, expected):
+    assert RESOLVER.route(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "bedroom",                                    # no show intent
+    "show me the bedroom and the villa",          # two images
+    "show me the kitchen",                        # unknown keyword
+    "show me the clubhouse",
+    "what is the price of the villa",             # pricing needs the LLM
+    "location advantage of dholera",              # leftover words
+    "show me the bedroom size in sq ft",
+    "where is the villa",                         # map + image
+    "show me the bedroom " + "please " * 10,      # too long
+    "",
+    None,
+])
+def test_other_queries_go_through_the_pipeline(query):
+    assert RESOLVER.route(query) == {}
+
+
+def test_scan_reports_every_intent():
+    hit = RESOLVER.scan("Show me the price and location of the bedrooms and villa")
+    assert hit == dict(images=["bedroom", "villa"], map=True, pricing=True, show=True)
+
+
+@pytest.mark.parametrize("answer, keyword, url", [
+    ("A cosy room.\nIMAGE: bedroom", "bedroom", "https://img/bedroom.jpg"),
+    ("A cosy room.\n**IMAGE: Bedroom**", "bedroom", "https://img/bedroom.jpg"),
+    ("A cosy room.\n`image: living room`", "living room", "https://img/living.jpg"),
+    ("A cosy room.\nIMAGE: Ramvan Villas: bedroom", "bedroom", "https://img/bedroom.jpg"),
+    ("A cosy room.\nIMAGE: bedroom interiors", "bedroom", "https://img/bedroom.jpg"),
+    ("A cosy room.\nIMAGE: bedrooms", "bedroom", "https://img/bedroom.jpg"),
+])
+def test_known_image_tag_is_resolved_and_stripped(answer, keyword, url):
+    text, found, found_url = RESOLVER.extract_image(answer)
+    assert (text, found, found_url) == ("A cosy room.", keyword, url)
+
+
+@pytest.mark.parametrize("answer, keyword", [
+    ("Nice pool.\nIMAGE: swimming pool", "swimming pool"),
+    ("Nice pool.\nIMAGE: Ramvan Villas: pool", "pool"),
+])
+def test_unknown_image_tag_is_left_in_place(answer, keyword):
+    assert RESOLVER.extract_image(answer) == (answer, keyword, None)
+
+
+@pytest.mark.parametrize("answer", ["No tag here.", "", None])
+def test_answer_without_tag(answer):
+    assert RESOLVER.extract_image(answer) == (answer, None, None)
+
+
+def test_strip_removes_every_tag():
+    answer = "Compare:\nIMAGE: Ramvan Villas: villa\nand\nIMAGE: Krupal Habitat: house"
+    assert strip_image_tags(answer) == "Compare:\n\nand"
@@ -0,0 +1,42 @@
+from sqlalchemy import inspect, text
+
+from database import db, upgrade_schema
+from models import AIMessage, Customer
+
+# tables as the original models created them (no created_at / project_name)
+OLD_SCHEMA = [
+    """CREATE TABLE customer (
+        id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL,
+        email VARCHAR(120) NOT NULL UNIQUE, phone VARCHAR(20), project_id VARCHAR(100))""",
+    """CREATE TABLE ai_message (
+        id INTEGER PRIMARY KEY, user_id VARCHAR(36) NOT NULL,
+        session_id VARCHAR(36) NOT NULL, role VARCHAR(10) NOT NULL,
+        message TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)""",
+    "INSERT INTO customer (name, email) VALUES ('Old Lead', 'old@example.com')",
+]
+
+
+def test_upgrade_schema_adds_new_columns_to_an_existing_database(app):
+    db.drop_all()
+    with db.engine.begin() as conn:
+        for stmt in OLD_SCHEMA:
+            conn.execute(text(stmt))
+
+    db.create_all()
+    upgrade_schema()
+    upgrade_schema()  # idempotent
+
+    inspector = inspect(db.engine)
+    assert "created_at" in {c["name"] for c in inspector.get_columns("customer")}
+    assert "project_name" in {c["name"] for c in inspector.get_columns("ai_message")}
+    assert "ix_customer_created_at" in {i["name"] for i in inspector.get_indexes("customer")}
+
+    old = Customer.query.filter_by(email="old@example.com").one()
+    assert old.to_dict()["created_at"] is None
+
+    db.session.add(Customer(name="New Lead", email="new@example.com"))
+    db.session.add(AIMessage(user_id="u", session_id="s", role="user",
+                             project_name="Ramvan Villas", message="hi"))
+    db.session.commit()
+    assert Customer.query.filter_by(email="new@example.com").one().created_at is not None
+    assert AIMessage.query.one().project_name == "Ramvan Villas"
@@ -0,0 +1,214 @@
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+
+import pytest
+
+from STT.voice_pipeline import (BargeInResponder, SentenceSegmenter, SpeculativeRetriever,
+                                 aiter_in_thread)
+
+
+def _segment(tokens, min_chars=12):
+    segmenter = SentenceSegmenter(min_chars)
+    out = []
+    for token in tokens:
+        out += segmenter.push(token)
+    return out, segmenter.flush()
+
+
+def _words(text):
+    return re.findall(r"\S+\s*", text)
+
+
+@pytest.mark.parametrize("text, sentences, rest", [
+    ("Plots cost Rs. 5000 per yard. Booking is open.",
+     ["Plots cost Rs. 5000 per yard."], ["Booking is open."]),
+    ("Plot No. 3 faces east. It is approx. 200 sq. yards, e.g. a small villa. Done.",
+     ["Plot No. 3 faces east.", "It is approx. 200 sq. yards, e.g. a small villa."], ["Done."]),
+    ("Near St. Mary's Church, Lansdowne. ", ["Near St. Mary's Church, Lansdowne."], []),
+    ("Is it ready? Yes! Possession is in March 2026.",
+     ["Is it ready?"], ["Yes! Possession is in March 2026."]),
+    ("Sure. The plot is 200 sq yards. ", ["Sure. The plot is 200 sq yards."], []),
+    ("**Price**: ₹40 lakh.\n- [Map](https://maps.example)\nIMAGE: payment plan",
+     ["Price: ₹40 lakh."], ["Map"]),
+])
+@pytest.mark.parametrize("split", ["whole", "words", "chars"])
+def test_sentences_do_not_depend_on_token_boundaries(text, sentences, rest, split):
+    tokens = {"whole": [text], "words": _words(text), "chars": list(text)}[split]
+    assert _segment(tokens) == (sentences, rest)
+
+
+def test_short_fragment_is_held_back_until_the_next_sentence():
+    segmenter = SentenceSegmenter()
+    assert segmenter.push("Okay. ") == []
+    assert segmenter.push("Sure. ") == []
+    assert segmenter.push("The plot is ready. ") == ["Okay. Sure. The plot is ready."]
+
+
+def test_flush_returns_the_held_back_fragment_once():
+    segmenter = SentenceSegmenter()
+    assert segmenter.push("Okay. ") == []
+    assert segmenter.flush() == ["Okay."]
+    assert segmenter.flush() == []
+
+
+def test_flush_drops_text_that_is_only_tags():
+    segmenter = SentenceSegmenter()
+    assert segmenter.push("Here is the plan.\n") == ["Here is the plan."]
+    segmenter.push("IMAGE: payment plan")
+    assert segmenter.flush() == []
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def test_new_utterance_cancels_the_answer_in_flight():
+    started, cancelled, interrupts = [], [], []
+
+    async def respond(query):
+        started.append(query)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(query)
+            raise
+
+    async def main():
+        responder = BargeInResponder(respond, on_interrupt=lambda: interrupts.append(1))
+        first = await responder.submit("first")
+        await asyncio.sleep(0)
+        second = await responder.submit("second")
+        await asyncio.sleep(0)
+        assert first.cancelled() and not second.done() and responder.busy
+        await responder.close()
+        assert second.cancelled() and not responder.busy
+        return responder.interrupted
+
+    assert asyncio.run(main()) == 2
+    assert started == cancelled == ["first", "second"]
+    assert interrupts == [1, 1]
+
+
+def test_finished_answer_is_not_an_interrupt():
+    interrupts = []
+
+    async def respond(query):
+        return query.upper()
+
+    async def main():
+        responder = BargeInResponder(respond, on_interrupt=lambda: interrupts.append(1))
+        assert await (await responder.submit("first")) == "FIRST"
+        assert await (await responder.submit("second")) == "SECOND"
+        await responder.close()
+        return responder.interrupted
+
+    assert asyncio.run(main()) == 0
+    assert interrupts == []
+
+
+def _endless(pulled):
+    i = 0
+    while True:
+        pulled.append(i)
+        yield i
+        i += 1
+        time.sleep(0.002)
+
+
+@pytest.mark.parametrize("pool", [False, True])
+def test_worker_stops_pulling_when_the_consumer_is_cancelled(pool):
+    pulled, seen = [], []
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(1) if pool else None
+
+    async def consume():
+        async for item in aiter_in_thread(_endless(pulled), stop, executor):
+            seen.append(item)
+
+    async def main():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        assert stop.is_set()
+        count = len(pulled)
+        await asyncio.sleep(0.05)
+        return count
+
+    count = asyncio.run(main())
+    assert seen and seen == list(range(len(seen)))
+    assert len(pulled) <= count + 1  # at most the item it was already fetching
+    if executor:
+        executor.shutdown(wait=True)  # returns: the pool's thread is free again
+
+
+def test_worker_errors_reach_the_consumer():
+    def failing():
+        yield "Sure."
+        raise RuntimeError("LLM down")
+
+    async def main():
+        seen = []
+        with pytest.raises(RuntimeError, match="LLM down"):
+            async for item in aiter_in_thread(failing()):
+                seen.append(item)
+        return seen
+
+    assert asyncio.run(main()) == ["Sure."]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+def _speculate(interims, final, settle=0.05):
+    """Feeds interim transcripts, then takes the final one. -> (context, retrieved, spec)"""
+    retrieved = []
+
+    def retrieve(query):
+        retrieved.append(query)
+        return f"context for {query}"
+
+    async def main():
+        spec = SpeculativeRetriever(retrieve, debounce_s=0.01)
+        for text in interims:
+            spec.on_interim(text)
+        await asyncio.sleep(settle)
+        task = spec.take(final)
+        context = await task if task else None
+        await asyncio.sleep(0.03)  # nothing still pending fires afterwards
+        return context, spec
+
+    context, spec = asyncio.run(main())
+    return context, retrieved, spec
+
+
+def test_close_final_transcript_uses_the_speculative_context():
+    context, retrieved, spec = _speculate(["what is the total cost of a"],
+                                          "what is the total cost of a plot")
+    assert context == "context for what is the total cost of a"
+    assert spec.stats()["hits"] == 1 and spec.stats()["misses"] == 0
+
+
+def test_different_final_transcript_is_a_miss():
+    context, retrieved, spec = _speculate(["what is the payment plan"],
+                                          "show me the bedroom of the villa")
+    assert context is None and retrieved == ["what is the payment plan"]
+    assert spec.stats()["hits"] == 0 and spec.stats()["misses"] == 1
+
+
+def test_interims_are_debounced_to_the_latest():
+    _, retrieved, _ = _speculate(["what is the", "what is the total", "what is the total cost"],
+                                 "what is the total cost")
+    assert retrieved == ["what is the total cost"]
+
+
+def test_take_cancels_a_pending_debounce():
+    context, retrieved, spec = _speculate(["what is the total cost"], "what is the total cost",
+                                          settle=0)
+    assert context is None and retrieved == []
+    assert spec.stats()["hits"] == spec.stats()["misses"] == 0
+
+
+def test_short_interims_are_ignored():
+    context, retrieved, _ = _speculate(["what is"], "what is")
+    assert context is None and retrieved == []
@@ -0,0 +1,70 @@
+import json
+import os
+import runpy
+import threading
+
+import pytest
+
+from Chatbot import warmup
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+@pytest.fixture
+def fake_warm_up(monkeypatch):
+    """warm_up() that stays "running" until the returned event is set."""
+    release = threading.Event()
+
+    def warm_up():
+        warmup._state["started"] = 1.0
+        release.wait(5)
+        warmup._state["finished"] = 2.0
+
+    monkeypatch.setattr(warmup, "warm_up", warm_up)
+    monkeypatch.setattr(warmup, "_thread", None)
+    monkeypatch.setattr(warmup, "_pid", None)
+    monkeypatch.setattr(warmup, "_state", dict(started=None, finished=None, steps={}, errors={}))
+    yield release
+    release.set()
+
+
+def _in_child(fn) -> dict:
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(write, json.dumps(fn()).encode())
+        finally:
+            os._exit(0)
+    os.close(write)
+    with os.fdopen(read) as f:
+        out = f.read()
+    os.waitpid(pid, 0)
+    return json.loads(out)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_worker_does_not_inherit_a_dead_warmup(fake_warm_up):
+    parent_thread = warmup.start_warmup()
+    assert warmup.readiness()["warmup"]["running"]
+
+    def child():
+        inherited = dict(running=warmup.readiness()["warmup"]["running"],
+                         thread=warmup._thread is not None)
+        thread = warmup.start_warmup()
+        return dict(inherited, started=thread.is_alive(), pid_ok=warmup._pid == os.getpid())
+
+    result = _in_child(child)
+    assert result == dict(running=False, thread=False, started=True, pid_ok=True)
+    assert warmup._thread is parent_thread  # parent unaffected
+
+
+def test_gunicorn_post_fork_starts_warmup(fake_warm_up, monkeypatch):
+    monkeypatch.delenv("WARMUP_IN_WORKERS", raising=False)
+    monkeypatch.delenv("WARMUP", raising=False)
+    conf = runpy.run_path(os.path.join(BACKEND, "gunicorn.conf.py"))
+
+    assert os.environ["WARMUP_IN_WORKERS"] == "1"  # app.py leaves it to the workers
+    assert warmup._thread is None
+    conf["post_fork"](None, None)
+    assert warmup._thread is not None and warmup.readiness()["warmup"]["running"]
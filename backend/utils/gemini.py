@@ -21,3 +21,11 @@ def query_gemini(prompt: str) -> str:
     except Exception as e:
         print("Error querying Gemini:", str(e))
         return "Sorry, I couldn't process your request."
+
+
+def stream_gemini(contents, timeout: float = 30):
+    """Yields text chunks; contents is a list of {"role", "parts"} turns."""
+    for chunk in model.generate_content(contents, stream=True,
+                                        request_options={"timeout": timeout}):
+        if chunk.text:
+            yield chunk.text
@@ -0,0 +1,313 @@
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+#admission control for LLM-backed routes: token buckets per user / IP / project
+#plus a global cap on in-flight LLM calls. State lives in-process, or in Redis
+#(RATE_LIMIT_REDIS_URL) so several gunicorn workers share the same limits.
+
+REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+
+# (refill per second, burst) per bucket kind
+USER_RATE = (float(os.getenv("RATE_LIMIT_USER_PER_MIN", "20")) / 60,
+             int(os.getenv("RATE_LIMIT_USER_BURST", "5")))
+IP_RATE = (float(os.getenv("RATE_LIMIT_IP_PER_MIN", "60")) / 60,
+           int(os.getenv("RATE_LIMIT_IP_BURST", "15")))
+PROJECT_RATE = (float(os.getenv("RATE_LIMIT_PROJECT_PER_MIN", "300")) / 60,
+                int(os.getenv("RATE_LIMIT_PROJECT_BURST", "50")))
+
+MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))      # concurrent LLM calls
+QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))   # seconds to wait for a slot
+SLOT_LEASE = 120  # seconds before a crashed worker's Redis slot is reclaimed
+SWEEP_INTERVAL = 60  # seconds between evictions of full in-memory buckets
+
+
+class RateLimited(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"{reason}, retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# token buckets: take(limits, cost) checks every bucket and only deducts if all
+# of them have room, so a request rejected on its project doesn't cost the user.
+# limits: [(key, rate_per_s, burst), ...]  ->  (allowed, retry_after, key)
+
+class MemoryBuckets:
+    def __init__(self, sweep_interval: float = SWEEP_INTERVAL):
+        self._state = {}  # key -> (tokens, last refill, time it is full again)
+        self._lock = threading.Lock()
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def take(self, limits, cost: float = 1):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            refilled = {}
+            worst = (0.0, None)
+            for key, rate, burst in limits:
+                tokens, ts, _ = self._state.get(key, (burst, now, now))
+                tokens = min(burst, tokens + (now - ts) * rate)
+                refilled[key] = (tokens, rate, burst)
+                if tokens < cost:
+                    wait = (cost - tokens) / rate
+                    if wait > worst[0]:
+                        worst = (wait, key)
+            allowed = worst[1] is None
+            for key, (tokens, rate, burst) in refilled.items():
+                if allowed:
+                    tokens -= cost
+                self._state[key] = (tokens, now, now + (burst - tokens) / rate)
+            return allowed, worst[0], worst[1]
+
+    def _sweep(self, now: float):
+        """Drops buckets that have refilled to burst (the Redis keys' EXPIRE)."""
+        for key in [k for k, (_, _, full_at) in self._state.items() if full_at <= now]:
+            del self._state[key]
+        self._next_sweep = now + self.sweep_interval
+
+
+_TAKE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+local cost = tonumber(ARGV[1])
+local tokens, worst, worst_key = {}, 0, ''
+for i, key in ipairs(KEYS) do
+  local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+  local s = redis.call('HMGET', key, 'tokens', 'ts')
+  local n = tonumber(s[1]) or burst
+  local ts = tonumber(s[2]) or now
+  n = math.min(burst, n + math.max(0, now - ts) * rate)
+  tokens[i] = n
+  if n < cost and (cost - n) / rate > worst then
+    worst, worst_key = (cost - n) / rate, key
+  end
+end
+for i, key in ipairs(KEYS) do
+  local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+  local n = tokens[i]
+  if worst_key == '' then n = n - cost end
+  redis.call('HSET', key, 'tokens', tostring(n), 'ts', tostring(now))
+  redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return {worst_key == '' and 1 or 0, tostring(worst), worst_key}
+"""
+
+
+class RedisBuckets:
+    def __init__(self, client, prefix: str = "rl:"):
+        self.prefix = prefix
+        self._take = client.register_script(_TAKE_LUA)
+
+    def take(self, limits, cost: float = 1):
+        keys = [self.prefix + key for key, _, _ in limits]
+        args = [cost]
+        for _, rate, burst in limits:
+            args += [rate, burst]
+        allowed, wait, key = self._take(keys=keys, args=args)
+        key = key.decode() if isinstance(key, bytes) else key
+        return bool(allowed), float(wait), key[len(self.prefix):] or None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# global in-flight cap: callers queue for a slot for up to `timeout` seconds
+
+class MemoryGate:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._sem = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def acquire(self, timeout: float):
+        if not self._sem.acquire(timeout=timeout):
+            return None
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self, token):
+        with self._lock:
+            self.in_flight -= 1
+        self._sem.release()
+
+
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1e6
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+  redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+  return 1
+end
+return 0
+"""
+
+
+class RedisGate:
+    """Slots are leased members of a sorted set (score = expiry)."""
+
+    POLL = 0.05
+
+    def __init__(self, client, limit: int, key: str = "rl:in_flight"):
+        self.limit = limit
+        self.key = key
+        self._client = client
+        self._acquire = client.register_script(_ACQUIRE_LUA)
+
+    @property
+    def in_flight(self) -> int:
+        return self._client.zcount(self.key, time.time(), "+inf")
+
+    def acquire(self, timeout: float):
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._acquire(keys=[self.key], args=[self.limit, SLOT_LEASE, token]):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.POLL)
+
+    def release(self, token):
+        self._client.zrem(self.key, token)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+class AdmissionController:
+    """
+    check(user_id, ip, project)  -> raises RateLimited when a bucket is empty
+    slot()                       -> context manager around one LLM call;
+                                    raises RateLimited if none frees up in time
+    """
+
+    def __init__(self, buckets, gate, user_rate=USER_RATE, ip_rate=IP_RATE,
+                 project_rate=PROJECT_RATE, queue_timeout: float = QUEUE_TIMEOUT):
+        self.buckets = buckets
+        self.gate = gate
+        self.user_rate = user_rate
+        self.ip_rate = ip_rate
+        self.project_rate = project_rate
+        self.queue_timeout = queue_timeout
+        self._counts = dict(admitted=0, rate_limited=0, queue_timeout=0)
+        self._lock = threading.Lock()
+
+    def _count(self, what: str):
+        with self._lock:
+            self._counts[what] += 1
+
+    def check(self, user_id=None, ip=None, project=None, cost: float = 1):
+        limits = []
+        if user_id:
+            limits.append((f"user:{user_id}", *self.user_rate))
+        if ip:
+            limits.append((f"ip:{ip}", *self.ip_rate))
+        if project:
+            limits.append((f"project:{project}", *self.project_rate))
+        if not limits:
+            return
+        allowed, retry_after, key = self.buckets.take(limits, cost)
+        if not allowed:
+            self._count("rate_limited")
+            raise RateLimited(f"Rate limit exceeded for {key.split(':')[0]}", retry_after)
+
+    @contextmanager
+    def slot(self, timeout: float = None):
+        token = self.gate.acquire(self.queue_timeout if timeout is None else timeout)
+        if token is None:
+            self._count("queue_timeout")
+            raise RateLimited("Too many requests in progress", self.queue_timeout / 2)
+        self._count("admitted")
+        try:
+            yield
+        finally:
+            self.gate.release(token)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts, in_flight=self.gate.in_flight,
+                        max_in_flight=self.gate.limit)
+
+
+def _build_admission():
+    if REDIS_URL:
+        try:
+            import redis
+
+            client = redis.Redis.from_url(REDIS_URL)
+            client.ping()
+            return AdmissionController(RedisBuckets(client), RedisGate(client, MAX_IN_FLIGHT))
+        except Exception as e:
+            print(f"[WARN] Redis rate limiting unavailable, using in-process limits: {e}")
+    return AdmissionController(MemoryBuckets(), MemoryGate(MAX_IN_FLIGHT))
+
+
+admission = _build_admission()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# load test:  python -m utils.rate_limit  (from backend/)
+# one scripted client hammers the endpoint from 20 threads while 5 regular
+# users ask a question every ~2s; LLM calls take 300ms behind a cap of 4.
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+    from collections import defaultdict
+
+    DURATION = 6.0
+    ctl = AdmissionController(
+        MemoryBuckets(), MemoryGate(4),
+        user_rate=(1.0, 3), ip_rate=(3.0, 6), project_rate=(10.0, 20), queue_timeout=1.0,
+    )
+    results = defaultdict(lambda: defaultdict(int))
+    latencies = defaultdict(list)
+    lock = threading.Lock()
+
+    def request(user, ip):
+        started = time.monotonic()
+        try:
+            ctl.check(user, ip, "Krupal Habitat")
+            with ctl.slot():
+                time.sleep(0.3)  # the LLM call
+            outcome = "ok"
+        except RateLimited as e:
+            outcome = "429 " + e.reason.split(" for ")[-1]
+        with lock:
+            results[user][outcome] += 1
+            if outcome == "ok":
+                latencies[user].append(time.monotonic() - started)
+
+    def abuser(i):
+        end = time.monotonic() + DURATION
+        while time.monotonic() < end:
+            request(f"bot-{i % 3}", "10.0.0.66")  # rotates user ids, same IP
+            time.sleep(0.01)
+
+    def regular(i):
+        end = time.monotonic() + DURATION
+        while time.monotonic() < end:
+            request(f"user-{i}", f"10.0.1.{i}")
+            time.sleep(2.0)
+
+    with ThreadPoolExecutor(max_workers=25) as pool:
+        for i in range(20):
+            pool.submit(abuser, i)
+        for i in range(5):
+            pool.submit(regular, i)
+
+    for user in sorted(results):
+        lat = sorted(latencies[user])
+        p95 = f"{lat[int(len(lat) * 0.95) - 1 if len(lat) > 1 else 0] * 1000:.0f} ms" if lat else "-"
+        print(f"{user:>8}: {dict(results[user])}  p95 admitted latency {p95}")
+    print(ctl.stats())
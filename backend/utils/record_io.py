@@ -0,0 +1,124 @@
+import csv
+import hmac
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+#used to read/write bulk records (JSON array, CSV, NDJSON) without holding the whole payload in memory.
+
+JSON_TYPES = ("application/json",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# exports carry customer PII: callers must send this shared secret in
+# EXPORT_TOKEN_HEADER. Unset = exports are disabled.
+EXPORT_API_TOKEN = os.getenv("EXPORT_API_TOKEN")
+EXPORT_TOKEN_HEADER = "X-Export-Token"
+
+
+def _format_for(content_type: str, filename: str = "") -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    filename = (filename or "").lower()
+    if content_type in CSV_TYPES or filename.endswith(".csv"):
+        return "csv"
+    if content_type in NDJSON_TYPES or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if content_type in JSON_TYPES or filename.endswith(".json"):
+        return "json"
+    raise ValueError(f"Unsupported content type: '{content_type or filename}'")
+
+
+def _iter_ndjson(text_stream):
+    for line_no, line in enumerate(text_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            # bad lines are reported per row instead of failing the whole upload
+            yield {"__error__": f"line {line_no}: {e}"}
+
+
+def iter_records(request):
+    """
+    Yields one dict per record from a Flask request.
+    Accepts a JSON array body, a CSV / NDJSON body, or a multipart upload
+    under the `file` field. CSV and NDJSON are read line by line from the stream.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        fmt = _format_for(upload.mimetype, upload.filename)
+        raw = upload.stream
+    else:
+        fmt = _format_for(request.mimetype)
+        raw = request.stream
+
+    if fmt == "json":
+        data = json.load(raw) if upload is not None else request.get_json(force=True)
+        if isinstance(data, dict):
+            data = data.get("customers", [data])
+        if not isinstance(data, list):
+            raise ValueError("JSON body must be an array of records")
+        yield from data
+        return
+
+    text_stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text_stream)
+    else:
+        yield from _iter_ndjson(text_stream)
+
+
+def chunked(iterable, size: int):
+    """Yields lists of at most `size` items."""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def stream_records(records, fmt: str, fields: list[str]):
+    """
+    Yields CSV (with header) or NDJSON text for an iterable of dicts,
+    one line per record so the response can be streamed as rows arrive.
+    """
+    if fmt == "csv":
+        yield _csv_line(fields)
+        for rec in records:
+            yield _csv_line(["" if rec.get(f) is None else rec.get(f) for f in fields])
+    elif fmt == "ndjson":
+        for rec in records:
+            yield json.dumps({f: rec.get(f) for f in fields}, ensure_ascii=False) + "\n"
+    else:
+        raise ValueError(f"Unsupported export format: '{fmt}'")
+
+
+def parse_export_args(args):
+    """
+    Reads ?format=csv|ndjson&since=&until= (ISO dates) from the query string.
+    Returns (fmt, since, until); raises ValueError on bad input.
+    """
+    fmt = (args.get("format") or "ndjson").lower()
+    if fmt not in EXPORT_MIMETYPES:
+        raise ValueError(f"Unsupported export format: '{fmt}'")
+    since, until = args.get("since"), args.get("until")
+    since = datetime.fromisoformat(since) if since else None
+    until = datetime.fromisoformat(until) if until else None
+    return fmt, since, until
+
+
+def export_authorized(headers) -> bool:
+    """True if `headers` carry the export token (constant-time compare)."""
+    sent = headers.get(EXPORT_TOKEN_HEADER, "")
+    return bool(EXPORT_API_TOKEN) and hmac.compare_digest(sent.encode(), EXPORT_API_TOKEN.encode())
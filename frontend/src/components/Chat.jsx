@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from "react";
 import { MessageCircle, X, Send, RefreshCw } from "lucide-react";
 
-const PROJECTS = ["Krupal Habitat", "Ramvan Villas", "Firefly Homes"];
+const PROJECTS = ["Krupal Habitat", "Ramvan Villas", "Firefly Homes", "All Projects"];
 const API_BASE = "http://localhost:5000";
 
 const getUserId = () => {